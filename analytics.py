@@ -0,0 +1,154 @@
+# analytics.py
+
+import datetime
+import threading
+
+import numpy as np
+
+from log_store import get_log_store
+
+
+class TrendAnalytics:
+    """
+    Per-user trend analytics over the food log.
+
+    Entries are loaded once into one pandas frame per user and extended
+    incrementally from the log store cursor. Derived results are cached per
+    user and only invalidated for users that received new entries, or for
+    everyone when the date changes (daily series run up to today).
+    pandas is only imported once analytics are first used.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.cursor = 0
+        self.frames = {}   # user -> DataFrame[timestamp, calories, goal, foods]
+        self._cache = {}   # (user, name, args) -> result
+        self._day = None   # Date the cached results run up to
+        self._lock = threading.RLock()  # Re-entered by results built on other results
+
+    def refresh(self):
+        import pandas as pd  # Deferred: only the trend view needs it
+
+        with self._lock:
+            entries, self.cursor = self.store.read_since(self.cursor)
+            if not entries:
+                return 0
+            new = pd.DataFrame({
+                "user": [entry["user"] for entry in entries],
+                "timestamp": pd.to_datetime([entry["timestamp"] for entry in entries]),
+                "calories": np.array([entry["total_calories"] for entry in entries], dtype=np.float64),
+                "goal": np.array([entry.get("daily_goal", np.nan) for entry in entries], dtype=np.float64),
+                "foods": [entry["foods"] for entry in entries],
+            })
+            for user, rows in new.groupby("user", sort=False):
+                rows = rows.drop(columns="user")
+                old = self.frames.get(user)
+                self.frames[user] = rows if old is None else pd.concat([old, rows], ignore_index=True)
+                self._cache = {key: value for key, value in self._cache.items() if key[0] != user}
+            return len(entries)
+
+    def _cached(self, user, name, args, compute):
+        with self._lock:
+            self.refresh()
+            today = datetime.date.today()
+            if today != self._day:
+                self._cache, self._day = {}, today
+            key = (user, name, args)
+            if key not in self._cache:
+                frame = self.frames.get(user)
+                self._cache[key] = compute(frame if frame is not None else _empty_frame())
+            return self._cache[key]
+
+    def daily(self, user):
+        """
+        One row per calendar day up to today (gaps filled with 0 kcal): calories, goal
+        """
+        def compute(frame):
+            import pandas as pd
+
+            if frame.empty:
+                return pd.DataFrame(columns=["calories", "goal"], dtype=np.float64)
+            days = frame.set_index("timestamp").resample("D")
+            daily = pd.DataFrame({"calories": days["calories"].sum(), "goal": days["goal"].last()})
+            # Days since the last entry count as logged nothing, so streaks end
+            end = max(daily.index[-1], pd.Timestamp(self._day))
+            daily = daily.reindex(pd.date_range(daily.index[0], end, freq="D"))
+            daily["calories"] = daily["calories"].fillna(0.0)
+            daily["goal"] = daily["goal"].ffill()
+            return daily
+        return self._cached(user, "daily", (), compute)
+
+    def rolling_intake(self, user, windows=(7, 30)):
+        """
+        Daily intake with rolling means over each window, and intake as a
+        fraction of goal over the same window
+        """
+        def compute(_):
+            daily = self.daily(user).copy()
+            for window in windows:
+                calories = daily["calories"].rolling(window, min_periods=1).mean()
+                goal = daily["goal"].rolling(window, min_periods=1).mean()
+                daily[f"avg_{window}d"] = calories
+                daily[f"goal_pct_{window}d"] = calories / goal
+            return daily
+        return self._cached(user, "rolling", tuple(windows), compute)
+
+    def food_frequency(self, user):
+        def compute(frame):
+            return frame["foods"].explode().dropna().value_counts()
+        return self._cached(user, "foods", (), compute)
+
+    def adherence_streaks(self, user):
+        """
+        Streaks of logged days at or under the daily goal.
+        Returns {"current": days, "longest": days}.
+        """
+        def compute(_):
+            daily = self.daily(user)
+            hit = ((daily["calories"] > 0) & (daily["calories"] <= daily["goal"])).to_numpy()
+            if not hit.any():
+                return {"current": 0, "longest": 0}
+            # Run lengths of consecutive True values
+            edges = np.flatnonzero(np.diff(np.concatenate(([0], hit.astype(np.int8), [0]))))
+            runs = edges[1::2] - edges[::2]
+            return {"current": int(runs[-1]) if hit[-1] else 0, "longest": int(runs.max())}
+        return self._cached(user, "streaks", (), compute)
+
+    def plot_trend(self, ax, user, days=30):
+        """
+        Draw daily intake, its 7-day average and the goal line for the last `days` days
+        """
+        trend = self.rolling_intake(user).tail(days)
+        ax.bar(trend.index, trend["calories"], color="#ff9999", label="Intake")
+        ax.plot(trend.index, trend["avg_7d"], color="#cc3333", label="7-day avg")
+        ax.plot(trend.index, trend["goal"], color="#339933", linestyle="--", label="Goal")
+        ax.set_title("Calorie Trend")
+        ax.legend(loc="upper left", fontsize="small")
+        ax.tick_params(axis="x", labelrotation=45, labelsize="small")
+
+
+def _empty_frame():
+    import pandas as pd
+
+    return pd.DataFrame({
+        "timestamp": pd.Series(dtype="datetime64[ns]"),
+        "calories": pd.Series(dtype=np.float64),
+        "goal": pd.Series(dtype=np.float64),
+        "foods": pd.Series(dtype=object),
+    })
+
+
+_analytics = None
+_analytics_lock = threading.Lock()
+
+
+def get_analytics():
+    """
+    Return the process-wide analytics engine over the default log store
+    """
+    global _analytics
+    with _analytics_lock:
+        if _analytics is None:
+            _analytics = TrendAnalytics(get_log_store())
+        return _analytics
@@ -0,0 +1,370 @@
+# api_server.py
+#
+# Headless HTTP API for many concurrent clients, built on asyncio streams:
+#
+#   python api_server.py --port 8000
+#
+#   POST /detect?conf=0.25          body: encoded image -> foods, portions, calories
+#   POST /entries                   JSON {user, foods, portions?, total_calories?, profile?}
+#   GET  /users/<name>/today        today's totals against the calorie goal
+#   GET  /users/<name>/profile      saved profile with BMR / TDEE / goal
+#   POST /users/<name>/profile      JSON profile -> computed targets (logged with the next entry)
+#   GET  /metrics                   timing histograms (with DIET_METRICS=1)
+#
+# Blocking work (inference, log and database I/O) runs on thread pools, so
+# the event loop only parses requests and writes responses.
+
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from daily_totals import get_daily_totals
+from instrumentation import snapshot, span
+from portion import meal_calories
+from tracker import CONF_THRESHOLD, detect_food_portions, load_existing_user, log_food_entry
+from user_profile import UserProfile, calorie_goal
+
+# === Limits
+MAX_BODY = 20 * 1024 * 1024   # Largest accepted upload, bytes
+DETECT_WORKERS = 1            # Concurrent inferences; more rarely helps on one model
+IO_WORKERS = 8
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _profile_targets(name, profile):
+    """
+    Validate a profile dict and return it with BMR / TDEE / goal
+    """
+    try:
+        user = UserProfile(name, int(profile["age"]), str(profile["gender"]), float(profile["height"]),
+                           float(profile["weight"]), "moderate", str(profile["goal"]))
+        summary = user.summary()
+    except KeyError as e:
+        raise HTTPError(400, f"Missing profile field {e}")
+    except (TypeError, ValueError) as e:
+        raise HTTPError(400, str(e))
+    saved = {"age": user.age, "gender": profile["gender"], "height": user.height_cm,
+             "weight": user.weight_kg, "goal": user.goal}
+    return saved, {"bmr": summary["BMR"], "tdee": summary["TDEE"], "daily_goal": round(summary["Daily Calorie Goal"])}
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _validate_entry(data):
+    """
+    Check a POST /entries body before anything is logged; raises HTTPError(400)
+    """
+    name, foods = data.get("user"), data.get("foods")
+    if not isinstance(name, str) or not name or not isinstance(foods, list) or not foods:
+        raise HTTPError(400, "Expected {\"user\": name, \"foods\": [...]}")
+    if not all(isinstance(food, str) and food for food in foods):
+        raise HTTPError(400, "foods must be a list of food names")
+    portions = data.get("portions")
+    if portions is not None:
+        if not isinstance(portions, list) or not all(_is_number(p) and p > 0 for p in portions):
+            raise HTTPError(400, "portions must be a list of positive numbers")
+        if len(portions) != len(foods):
+            raise HTTPError(400, "portions must match foods")
+    total = data.get("total_calories")
+    if total is not None and not (_is_number(total) and total >= 0):
+        raise HTTPError(400, "total_calories must be a non-negative number")
+    profile = data.get("profile")
+    if profile is not None and not isinstance(profile, dict):
+        raise HTTPError(400, "profile must be an object")
+
+
+class DietService:
+    """
+    Request handlers, independent of the transport: handle() takes a parsed
+    request and returns (status, JSON-able payload). The asyncio server and
+    LocalClient both call it.
+
+    Profiles live in the log, on entries. One set through POST
+    /users/<name>/profile is held in `pending_profiles` (event loop only)
+    and used by that user's reads until their next entry logs it.
+    """
+
+    def __init__(self, detect_workers=DETECT_WORKERS, io_workers=IO_WORKERS):
+        self.detect_pool = ThreadPoolExecutor(detect_workers, thread_name_prefix="api-detect")
+        self.io_pool = ThreadPoolExecutor(io_workers, thread_name_prefix="api-io")
+        self.pending_profiles = {}  # user -> profile not yet logged with an entry
+        self.routes = [
+            ("POST", re.compile(r"/detect"), self.detect),
+            ("POST", re.compile(r"/entries"), self.add_entry),
+            ("GET", re.compile(r"/users/(?P<name>[^/]+)/today"), self.today),
+            ("GET", re.compile(r"/users/(?P<name>[^/]+)/profile"), self.get_profile),
+            ("POST", re.compile(r"/users/(?P<name>[^/]+)/profile"), self.set_profile),
+            ("GET", re.compile(r"/metrics"), self.metrics),
+        ]
+
+    async def _run(self, pool, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+
+    async def _profile(self, name):
+        """
+        The user's newest profile: one set but not yet logged, else the saved one
+        """
+        profile = self.pending_profiles.get(name)
+        if profile is None:
+            profile = await self._run(self.io_pool, load_existing_user, name)
+        return profile
+
+    async def handle(self, method, target, body=b""):
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.fullmatch(url.path)
+            if match is None:
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            params = {key: unquote(value) for key, value in match.groupdict().items()}
+            try:
+                with span(f"api.{handler.__name__}"):
+                    return await handler(body=body, query=query, **params)
+            except HTTPError as e:
+                return e.status, {"error": str(e)}
+        if allowed:
+            return 405, {"error": f"{method} not allowed on {url.path}"}
+        return 404, {"error": f"No route for {url.path}"}
+
+    @staticmethod
+    def _json(body):
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Body is not valid JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        return data
+
+    # === Endpoints
+    async def detect(self, body, query):
+        if not body:
+            raise HTTPError(400, "Send the encoded image as the request body")
+        try:
+            conf = float(query.get("conf", CONF_THRESHOLD))
+        except ValueError:
+            raise HTTPError(400, "conf must be a number")
+        foods, portions = await self._run(self.detect_pool, _detect_bytes, body, conf)
+        if foods is None:
+            raise HTTPError(400, "Could not decode image")
+        calories = await self._run(self.io_pool, meal_calories, foods, portions)
+        return 200, {"foods": foods, "portions": portions, "calories": calories}
+
+    async def add_entry(self, body, query):
+        data = self._json(body)
+        _validate_entry(data)
+        name, foods, portions = data["user"], data["foods"], data.get("portions")
+
+        profile = data.get("profile")
+        if profile is not None:
+            profile, _ = _profile_targets(name, profile)
+        else:
+            profile = await self._profile(name)
+            if not profile:
+                raise HTTPError(404, f"No saved profile for {name}; include \"profile\" in the entry")
+
+        def write():
+            total = data.get("total_calories")
+            if total is None:
+                try:
+                    total = meal_calories(foods, portions)
+                except KeyError as e:
+                    raise HTTPError(400, f"Unknown food {e}")
+            goal = calorie_goal(profile)
+            log_food_entry(name, foods, total, goal, profile, verbose=False)
+            return total, goal
+
+        total, goal = await self._run(self.io_pool, write)
+        if self.pending_profiles.get(name) is profile or data.get("profile") is not None:
+            self.pending_profiles.pop(name, None)  # Now in the log
+        return 201, {"user": name, "foods": foods, "total_calories": total, "daily_goal": goal}
+
+    async def today(self, body, query, name):
+        day = query.get("date", datetime.date.today().isoformat())
+
+        def read():
+            return get_daily_totals().get(name, day)
+
+        totals = await self._run(self.io_pool, read)
+        profile = await self._profile(name)
+        result = {"user": name, "date": day, **totals}
+        if profile:
+            result["daily_goal"] = calorie_goal(profile)
+            result["remaining"] = round(result["daily_goal"] - totals["calories"])
+        return 200, result
+
+    async def get_profile(self, body, query, name):
+        profile = await self._profile(name)
+        if not profile:
+            raise HTTPError(404, f"No saved profile for {name}")
+        profile, targets = _profile_targets(name, profile)
+        return 200, {"user": name, "profile": profile, **targets}
+
+    async def set_profile(self, body, query, name):
+        profile, targets = _profile_targets(name, self._json(body))
+        self.pending_profiles[name] = profile
+        return 200, {"user": name, "profile": profile, **targets}
+
+    async def metrics(self, body, query):
+        return 200, snapshot()
+
+    def close(self):
+        self.detect_pool.shutdown(wait=False, cancel_futures=True)
+        self.io_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _detect_bytes(data, conf_threshold):
+    """
+    Run detection on an uploaded image; (None, None) if it cannot be decoded
+    """
+    try:
+        return detect_food_portions(data, conf_threshold)
+    except ValueError:
+        return None, None
+
+
+# === HTTP/1.1 transport
+
+async def _read_request(reader):
+    """
+    Return (method, target, headers, body), or None when the client closed
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0) or 0)
+    except ValueError:
+        raise HTTPError(400, "Invalid Content-Length")
+    if length < 0:
+        raise HTTPError(400, "Invalid Content-Length")
+    if length > MAX_BODY:
+        raise HTTPError(413, f"Body larger than {MAX_BODY} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+class APIServer:
+    """
+    Serves a DietService over HTTP/1.1 with keep-alive; each connection is
+    its own task, so slow clients and long inferences don't hold up others.
+    """
+
+    def __init__(self, service=None, host="127.0.0.1", port=8000):
+        self.service = service or DietService()
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def _connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except HTTPError as e:
+                    writer.write(_response(e.status, {"error": str(e)}, keep_alive=False))
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    status, payload = await self.service.handle(method, target, body)
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]  # Resolve port 0
+        return self
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"🌐 Serving on http://{self.host}:{self.port}")
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        self.service.close()
+
+
+class LocalClient:
+    """
+    In-process client for tests and scripts: calls DietService.handle()
+    directly, no sockets. Responses are (status, payload).
+    """
+
+    def __init__(self, service=None):
+        self.service = service or DietService()
+
+    async def get(self, path):
+        return await self.service.handle("GET", path)
+
+    async def post(self, path, data=None, json_body=None):
+        body = json.dumps(json_body).encode("utf-8") if json_body is not None else (data or b"")
+        return await self.service.handle("POST", path, body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Smart Diet Tracker HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--detect-workers", type=int, default=DETECT_WORKERS)
+    args = parser.parse_args()
+
+    server = APIServer(DietService(detect_workers=args.detect_workers), args.host, args.port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("👋 Stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# batch_ingest.py
+#
+# Backfill the food log from a directory of meal photos:
+#
+#   python batch_ingest.py photos/ --user Maaz --batch-size 32
+#
+# Progress is checkpointed after every logged image, so re-running the same
+# command after a crash continues where it stopped.
+
+import argparse
+import datetime
+import os
+import time
+
+from detection_cache import get_detection_cache
+from instrumentation import profiled
+from portion import meal_calories
+from tracker import detect_food_batch, load_existing_user, log_food_entry
+from user_profile import calorie_goal
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+
+
+def find_images(folder):
+    paths = []
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def load_checkpoint(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return {line.rstrip("\n") for line in f}
+    except FileNotFoundError:
+        return set()
+
+
+def ingest(folder, name, batch_size=16, num_workers=4, checkpoint=None):
+    profile = load_existing_user(name)
+    if not profile:
+        raise SystemExit(f"❌ No saved profile for {name}. Run tracker.py first to set up.")
+    goal = calorie_goal(profile)
+
+    checkpoint = checkpoint or os.path.join(folder, ".ingest_checkpoint")
+    done = load_checkpoint(checkpoint)
+    paths = [p for p in find_images(folder) if p not in done]
+    print(f"📂 {len(paths)} images to process ({len(done)} already done)")
+
+    start = time.perf_counter()
+    processed = logged = 0
+    with open(checkpoint, "a", encoding="utf-8") as ckpt:
+        for path, food_items, portions in detect_food_batch(paths, batch_size, num_workers):
+            if food_items is None:
+                print(f"⚠️ Could not read {path}")
+            elif food_items:
+                total_cal = meal_calories(food_items, portions)
+                taken = datetime.datetime.fromtimestamp(os.path.getmtime(path))
+                log_food_entry(name, food_items, total_cal, goal, profile, timestamp=taken, verbose=False)
+                logged += 1
+
+            # Checkpoint after logging: a crash can at worst re-log the last image
+            ckpt.write(path + "\n")
+            ckpt.flush()
+            processed += 1
+            if processed % batch_size == 0:
+                rate = processed / (time.perf_counter() - start)
+                print(f"🔄 {processed}/{len(paths)} images | {rate:.1f} img/s")
+
+    elapsed = time.perf_counter() - start
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(f"✅ Processed {processed} images, logged {logged} meals in {elapsed:.1f}s ({rate:.1f} img/s)")
+
+    cache = get_detection_cache()
+    if cache is not None:
+        stats = cache.stats()
+        print(f"🗃️ Detection cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-ingest meal photos into the food log")
+    parser.add_argument("folder", help="Directory of meal photos (searched recursively)")
+    parser.add_argument("--user", required=True, help="Name of an existing user profile")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=4, help="Image decoding threads")
+    parser.add_argument("--checkpoint", help="Resume file (default: <folder>/.ingest_checkpoint)")
+    args = parser.parse_args()
+
+    with profiled("batch_ingest"):
+        ingest(args.folder, args.user, args.batch_size, args.workers, args.checkpoint)
+
+
+if __name__ == "__main__":
+    main()
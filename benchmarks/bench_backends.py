@@ -0,0 +1,95 @@
+# benchmarks/bench_backends.py
+#
+# Latency and accuracy parity of the detector backends on the bundled sample
+# images. The torch backend is the reference: for every other backend we report
+# how many reference detections it reproduces (same class, IoU >= 0.5) and how
+# many extra boxes it adds.
+#
+#   python -m benchmarks.bench_backends --backends torch onnx onnx-int8 --threads 4
+
+import argparse
+import glob
+import os
+import statistics
+import time
+
+import cv2
+import numpy as np
+
+from detector_backend import create_backend
+from frame_stream import iou_matrix
+from model_registry import DEFAULT_WEIGHTS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_images(folder):
+    paths = sorted(glob.glob(os.path.join(folder, "*.jpg")) + glob.glob(os.path.join(folder, "*.png")))
+    return [(path, cv2.imread(path)) for path in paths]
+
+
+def match_counts(reference, candidate, iou_threshold=0.5):
+    """
+    Return (matched reference boxes, unmatched candidate boxes)
+    """
+    if not len(reference) or not len(candidate):
+        return 0, len(candidate)
+    iou = iou_matrix(reference, candidate)
+    iou[reference[:, None, 5] != candidate[None, :, 5]] = 0.0
+    matched = int((iou.max(axis=1) >= iou_threshold).sum())
+    extra = int((iou.max(axis=0) < iou_threshold).sum())
+    return matched, extra
+
+
+def time_backend(backend, images, conf, runs):
+    latencies = []
+    outputs = None
+    backend.predict([images[0]], conf)  # Warm-up
+    for _ in range(runs):
+        outputs = []
+        for image in images:
+            start = time.perf_counter()
+            outputs.append(backend.predict([image], conf)[0])
+            latencies.append(time.perf_counter() - start)
+    return latencies, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detector backend latency / parity benchmark")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--images", default=os.path.join(ROOT, "assets"))
+    parser.add_argument("--weights", default=DEFAULT_WEIGHTS)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    loaded = load_images(args.images)
+    if not loaded:
+        raise SystemExit(f"No images found in {args.images}")
+    images = [image for _, image in loaded]
+    print(f"🖼️ {len(images)} images, {args.runs} runs each, threads={args.threads or 'default'}")
+
+    reference = None
+    for name in args.backends:
+        backend = create_backend(name, args.weights, args.threads)
+        latencies, outputs = time_backend(backend, images, args.conf, args.runs)
+        ms = np.array(latencies) * 1000
+        line = f"{name:<10} median {statistics.median(ms):7.1f} ms | p95 {np.percentile(ms, 95):7.1f} ms"
+
+        if reference is None:
+            reference = outputs
+            line += f" | {sum(len(o) for o in outputs)} boxes (reference)"
+        else:
+            matched = extra = 0
+            for ref, out in zip(reference, outputs):
+                m, e = match_counts(ref, out)
+                matched, extra = matched + m, extra + e
+            total = sum(len(o) for o in reference)
+            recall = matched / total if total else 1.0
+            line += f" | recall vs {args.backends[0]} {recall:.1%} | {extra} extra boxes"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_memory.py
+#
+# Memory held by a synthetic log as plain JSON dicts vs. CompactLog,
+# measured as resident-set growth while each one is built.
+#
+#   python -m benchmarks.bench_memory --entries 1000000
+
+import argparse
+import datetime
+import gc
+import json
+import random
+import time
+
+import psutil
+
+from benchmarks.synthetic import synthetic_entries
+from compact_log import CompactLog
+
+
+def synthetic_lines(count, users=500, seed=42):
+    """
+    Yield JSON lines shaped like tracker log entries, spread over a year
+    """
+    for entry in synthetic_entries(count, users, seed, end=datetime.datetime(2026, 1, 1)):
+        yield json.dumps(entry)
+
+
+def measure(build):
+    """
+    Return (result, bytes of RSS growth while building it, seconds)
+    """
+    process = psutil.Process()
+    gc.collect()
+    before = process.memory_info().rss
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    return result, process.memory_info().rss - before, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Log memory footprint benchmark")
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"🧪 {args.entries:,} synthetic entries across {args.users} users")
+    dicts, dict_bytes, dict_time = measure(
+        lambda: [json.loads(line) for line in synthetic_lines(args.entries, args.users)])
+    print(f"JSON dicts  {dict_bytes / 2**20:9.1f} MiB  ({dict_bytes / args.entries:6.0f} B/entry, {dict_time:.1f}s)")
+
+    # Built straight from the JSON lines so everything it retains is counted
+    compact, compact_bytes, compact_time = measure(
+        lambda: CompactLog(json.loads(line) for line in synthetic_lines(args.entries, args.users)))
+    print(f"CompactLog  {compact_bytes / 2**20:9.1f} MiB  ({compact_bytes / args.entries:6.0f} B/entry, {compact_time:.1f}s)")
+    print(f"📉 {dict_bytes / compact_bytes:.1f}x smaller, "
+          f"{len(compact.profiles)} distinct profiles, {len(compact.users)} users")
+
+    sample = random.Random(0).sample(range(args.entries), min(1000, args.entries))
+    mismatched = sum(compact[i]["foods"] != dicts[i]["foods"]
+                     or compact[i]["total_calories"] != dicts[i]["total_calories"]
+                     for i in sample)
+    print(f"🔁 Round-trip check on {len(sample)} rows: {mismatched} mismatches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# benchmarks/bench_profiles.py
+#
+# Calorie goals for a large member base: one UserProfile per member vs.
+# a single ProfileBatch over column arrays.
+#
+#   python -m benchmarks.bench_profiles --profiles 1000000
+
+import argparse
+import time
+
+import numpy as np
+
+from user_profile import ACTIVITY_LEVELS, GENDERS, GOALS, ProfileBatch, UserProfile
+
+
+def synthetic_columns(count, seed=42):
+    rng = np.random.default_rng(seed)
+    return (
+        rng.integers(18, 80, count),
+        rng.integers(0, len(GENDERS), count),
+        rng.uniform(150, 200, count),
+        rng.uniform(45, 130, count),
+        rng.integers(0, len(ACTIVITY_LEVELS), count),
+        rng.integers(0, len(GOALS), count),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch BMR/TDEE/goal benchmark")
+    parser.add_argument("--profiles", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    age, gender, height, weight, activity, goal = synthetic_columns(args.profiles)
+    print(f"🧪 {args.profiles:,} synthetic profiles")
+
+    start = time.perf_counter()
+    scalar = [
+        UserProfile("", int(a), GENDERS[g], float(h), float(w), ACTIVITY_LEVELS[act], GOALS[gl]).get_calorie_goal()
+        for a, g, h, w, act, gl in zip(age, gender, height, weight, activity, goal)
+    ]
+    scalar_time = time.perf_counter() - start
+    print(f"UserProfile   {scalar_time:8.3f}s  ({args.profiles / scalar_time:12,.0f} profiles/s)")
+
+    start = time.perf_counter()
+    batch = ProfileBatch(age, gender, height, weight, activity, goal).calorie_goal()
+    batch_time = time.perf_counter() - start
+    print(f"ProfileBatch  {batch_time:8.3f}s  ({args.profiles / batch_time:12,.0f} profiles/s)")
+
+    print(f"🚀 {scalar_time / batch_time:.0f}x faster, "
+          f"max difference {np.abs(np.array(scalar) - batch).max():.2e} kcal")
+
+
+if __name__ == "__main__":
+    main()
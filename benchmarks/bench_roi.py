@@ -0,0 +1,97 @@
+# benchmarks/bench_roi.py
+#
+# Latency / accuracy trade-off of region-of-interest cropping and smaller
+# YOLO input sizes. Each image is treated as a fixed camera view replayed
+# for --runs frames (the region is found once, then reused). Full frames at
+# 640 px are the reference: for every other setting we report how many
+# reference food detections it reproduces (same class, IoU >= 0.5) and how
+# many extra boxes it adds.
+#
+#   python -m benchmarks.bench_roi --images assets --backend onnx --budgets 40 80
+
+import argparse
+import os
+import statistics
+import time
+
+import numpy as np
+
+from benchmarks.bench_backends import load_images, match_counts
+from detector_backend import create_backend
+from model_registry import DEFAULT_WEIGHTS
+from postprocess import build_food_lookup
+from roi import IMAGE_SIZES, AdaptiveBackend
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_setting(detector, images, conf, runs):
+    """
+    Returns (per-frame latencies, last output per image)
+    """
+    latencies, outputs = [], []
+    for image in images:
+        detector.region = None
+        detector.since_refresh = detector.refresh_every
+        for _ in range(runs):
+            start = time.perf_counter()
+            data = detector.predict([image], conf)[0]
+            latencies.append(time.perf_counter() - start)
+        outputs.append(np.asarray(data, dtype=np.float32).reshape(-1, 6))
+    return latencies, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ROI cropping / input size latency-accuracy benchmark")
+    parser.add_argument("--backend", default="torch", choices=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--images", default=os.path.join(ROOT, "assets"))
+    parser.add_argument("--weights", default=DEFAULT_WEIGHTS)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--runs", type=int, default=20, help="Frames per image")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[512, 384, 320])
+    parser.add_argument("--budgets", type=float, nargs="*", default=[], help="Latency budgets (ms) to try")
+    args = parser.parse_args()
+
+    loaded = load_images(args.images)
+    if not loaded:
+        raise SystemExit(f"No images found in {args.images}")
+    images = [image for _, image in loaded]
+    backend = create_backend(args.backend, args.weights, args.threads)
+    backend.predict([images[0]], args.conf)  # Warm-up
+    food = build_food_lookup(backend.names) >= 0
+
+    settings = [("full 640", AdaptiveBackend(backend, roi="", latency_budget_ms=0))]
+    settings += [(f"full {size}", AdaptiveBackend(backend, roi="", latency_budget_ms=0, max_size=size))
+                 for size in args.sizes]
+    settings += [(f"roi {mode}", AdaptiveBackend(backend, roi=mode, latency_budget_ms=0, refresh_every=args.runs))
+                 for mode in ("objects", "saliency")]
+    for budget in args.budgets:
+        settings.append((f"roi+budget {budget:g}ms",
+                         AdaptiveBackend(backend, roi="objects", latency_budget_ms=budget, refresh_every=args.runs)))
+
+    print(f"🖼️ {len(images)} images x {args.runs} frames, {args.backend} backend, sizes {IMAGE_SIZES}")
+    reference = None
+    for name, detector in settings:
+        latencies, outputs = run_setting(detector, images, args.conf, args.runs)
+        outputs = [out[food[out[:, 5].astype(np.intp)]] for out in outputs]  # Accuracy on food only
+        ms = np.array(latencies) * 1000
+        line = f"{name:<22} median {statistics.median(ms):7.1f} ms | p95 {np.percentile(ms, 95):7.1f} ms"
+        if detector.sizes is not None:
+            line += f" | size cap {detector.sizes.size} px"
+
+        if reference is None:
+            reference = outputs
+            line += f" | {sum(len(o) for o in outputs)} food boxes (reference)"
+        else:
+            matched = extra = 0
+            for ref, out in zip(reference, outputs):
+                m, e = match_counts(ref, out)
+                matched, extra = matched + m, extra + e
+            total = sum(len(o) for o in reference)
+            line += f" | recall {matched / total if total else 1.0:.1%} | {extra} extra boxes"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
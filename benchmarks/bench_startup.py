@@ -0,0 +1,77 @@
+# benchmarks/bench_startup.py
+#
+# Measures cold import time of the app modules and time-to-first-window
+# for ui_main, each in a fresh interpreter.
+#
+#   python -m benchmarks.bench_startup --runs 5
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import {module}
+print(time.perf_counter() - t0)
+"""
+
+WINDOW_SNIPPET = """
+import sys
+from PyQt5.QtWidgets import QApplication
+import ui_main
+from model_registry import warm_up_async
+app = QApplication(sys.argv)
+window = ui_main.SmartDietTracker()
+window.show()
+app.processEvents()
+print("shown", flush=True)
+warm_up_async().join()
+print("model", flush=True)
+"""
+
+
+def time_import(module):
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET.format(module=module)],
+                         capture_output=True, text=True, check=True, cwd=ROOT)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def time_first_window():
+    """
+    Return (seconds until the window is shown, seconds until the model is warm),
+    both measured from process launch
+    """
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", WINDOW_SNIPPET],
+                            stdout=subprocess.PIPE, text=True, env=env, cwd=ROOT)
+    marks = {}
+    for line in proc.stdout:
+        marks[line.strip()] = time.perf_counter() - t0
+    proc.wait()
+    return marks.get("shown"), marks.get("model")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup-time benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    for module in ("tracker", "food_detector", "ui_main"):
+        times = [time_import(module) for _ in range(args.runs)]
+        print(f"import {module:<14} median {statistics.median(times) * 1000:8.1f} ms")
+
+    shown, warm = zip(*(time_first_window() for _ in range(args.runs)))
+    print(f"first window         median {statistics.median(shown) * 1000:8.1f} ms")
+    print(f"model warm           median {statistics.median(warm) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# benchmarks/bench_suite.py
+#
+# Headless end-to-end benchmark of the detection, logging and dashboard
+# paths on a synthetic log, run in a scratch directory (no camera needed).
+# Results are written as JSON and can be compared with a stored baseline:
+#
+#   python -m benchmarks.bench_suite --entries 1000000 --output baseline.json
+#   python -m benchmarks.bench_suite --entries 1000000 --baseline baseline.json
+#
+# Exits with status 1 when a metric is worse than the baseline by more than
+# --tolerance.
+
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+import psutil
+
+import log_store
+from benchmarks.synthetic import synthetic_entries
+from daily_totals import get_daily_totals
+from log_index import get_log_index
+from log_store import get_log_store
+from tracker import detect_food_batch, detect_food_portions, load_existing_user, log_food_entry
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def latency_stats(samples):
+    """
+    Seconds -> {count, mean_ms, p50_ms, p95_ms, max_ms}
+    """
+    ms = np.array(samples) * 1000
+    return {
+        "count": len(ms),
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+        "max_ms": round(float(ms.max()), 4),
+    }
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def sample(fn, inputs):
+    samples = []
+    for item in inputs:
+        samples.append(timed(fn, item)[1])
+    return latency_stats(samples)
+
+
+def rss_mib():
+    return round(psutil.Process().memory_info().rss / 2**20, 1)
+
+
+def peak_rss_mib():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)  # bytes on macOS, KiB on Linux
+    except ImportError:
+        return round(psutil.Process().memory_info().peak_wset / 2**20, 1)  # Windows
+
+
+def bench_log(args, users):
+    results = {}
+    store = get_log_store()
+    today = datetime.date.today().isoformat()
+
+    count, seconds = timed(store.import_entries, synthetic_entries(args.entries, args.users, days=args.days))
+    results["generate"] = {"entries": count, "seconds_s": round(seconds, 3),
+                           "entries_per_s": round(count / seconds)}
+
+    # Cold: tail scan of the store, before any index exists
+    results["profile_lookup_cold"] = sample(store.latest_profile, users)
+
+    _, seconds = timed(get_log_index().refresh)
+    results["index_build"] = {"seconds_s": round(seconds, 3), "rss_mib": rss_mib()}
+    results["profile_lookup"] = sample(load_existing_user, users)
+    results["today_table_query"] = sample(lambda user: get_log_index().entries_for_day(user, today), users)
+
+    _, seconds = timed(get_daily_totals().sync)
+    results["totals_initial_sync"] = {"seconds_s": round(seconds, 3)}
+    results["today_total"] = sample(lambda user: get_daily_totals().get(user, today), users)
+
+    profile = store.latest_profile(users[0])
+    results["log_append"] = sample(
+        lambda i: log_food_entry(users[i % len(users)], ["apple", "banana"], 200, 2500, profile, verbose=False),
+        range(args.appends))
+    return results
+
+
+def bench_today_widget(users):
+    """
+    SmartDietTracker.update_today_table on an offscreen Qt platform
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PyQt5.QtWidgets import QApplication
+        import ui_main
+    except ImportError as e:
+        return {"skipped": str(e)}
+    app = QApplication.instance() or QApplication(sys.argv)
+    window = ui_main.SmartDietTracker()
+    window.goal = 2500
+
+    def refresh(user):
+        window.username = user
+        window.update_today_table()
+        app.processEvents()
+    return sample(refresh, users)
+
+
+def bench_detection(args):
+    paths = sorted(glob.glob(os.path.join(args.images, "*.jpg")) + glob.glob(os.path.join(args.images, "*.png")))
+    if not paths:
+        return {"skipped": f"no images in {args.images}"}
+    os.environ["DIET_DETECTION_CACHE"] = "0"  # Measure the model, not cache hits
+    images = [cv2.imread(path) for path in paths]
+    try:
+        detect_food_portions(images[0])  # Loads and warms the model
+    except ImportError as e:
+        return {"skipped": str(e)}
+
+    results = {
+        "latency": sample(detect_food_portions, [image for _ in range(args.detect_runs) for image in images]),
+    }
+    batch = paths * max(1, args.detect_batch // len(paths))
+    start = time.perf_counter()
+    for _ in detect_food_batch(batch, batch_size=16):
+        pass
+    seconds = time.perf_counter() - start
+    results["batch"] = {"images": len(batch), "seconds_s": round(seconds, 3),
+                        "images_per_s": round(len(batch) / seconds, 2)}
+    return results
+
+
+def flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[prefix + key] = value
+    return flat
+
+
+def compare(results, baseline, tolerance):
+    """
+    Print current vs baseline for every comparable metric; return the regressions
+    """
+    current, previous = flatten(results), flatten(baseline)
+    regressions = []
+    print(f"\n{'metric':<40} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, value in current.items():
+        old = previous.get(name)
+        higher_better = name.endswith("per_s")
+        lower_better = name.endswith(("_ms", "_s", "_mib")) and not name.endswith("max_ms")  # Max is too noisy
+        if old is None or not old or not (higher_better or lower_better):
+            continue
+        change = (value - old) / old
+        worse = -change if higher_better else change
+        flag = ""
+        if worse > tolerance:
+            flag = " ⚠️"
+            regressions.append(name)
+        print(f"{name:<40} {old:>12,.3f} {value:>12,.3f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark suite")
+    parser.add_argument("--entries", type=int, default=100_000, help="Synthetic log size (1k to 10M)")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=365, help="Time span of the synthetic log")
+    parser.add_argument("--backend", choices=sorted(log_store.BACKENDS), default=log_store.LOG_BACKEND)
+    parser.add_argument("--lookups", type=int, default=200, help="Users sampled per query benchmark")
+    parser.add_argument("--appends", type=int, default=200)
+    parser.add_argument("--images", default=os.path.join(ROOT, "assets"))
+    parser.add_argument("--detect-runs", type=int, default=10)
+    parser.add_argument("--detect-batch", type=int, default=64, help="Images in the throughput run")
+    parser.add_argument("--skip-detection", action="store_true")
+    parser.add_argument("--skip-ui", action="store_true")
+    parser.add_argument("--workdir", help="Scratch directory (default: a new temp dir)")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Compare against this results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed slowdown, as a fraction")
+    args = parser.parse_args()
+
+    args.images = os.path.abspath(args.images)
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = os.path.abspath(args.baseline) if args.baseline else None
+    workdir = args.workdir or tempfile.mkdtemp(prefix="diet-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)  # Log, totals and cache files are created relative to here
+    log_store.LOG_BACKEND = args.backend
+
+    print(f"🧪 {args.entries:,} entries, {args.users} users, {args.backend} store, in {workdir}")
+    users = random.Random(0).choices([f"user{u}" for u in range(args.users)], k=args.lookups)
+
+    results = {"log": bench_log(args, users)}
+    if not args.skip_ui:
+        results["today_widget"] = bench_today_widget(users)
+    if not args.skip_detection:
+        results["detection"] = bench_detection(args)
+    results["peak_rss_mib"] = peak_rss_mib()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "entries": args.entries, "users": args.users, "backend": args.backend,
+            "python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+    print(json.dumps(results, indent=2))
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results written to {output}")
+
+    if baseline:
+        with open(baseline, encoding="utf-8") as f:
+            previous = json.load(f)
+        if previous["meta"].get("entries") != args.entries:
+            print(f"⚠️ Baseline was run with {previous['meta'].get('entries'):,} entries")
+        regressions = compare(results, previous["results"], args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}")
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
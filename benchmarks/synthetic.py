@@ -0,0 +1,45 @@
+# benchmarks/synthetic.py
+#
+# Deterministic synthetic food logs for the benchmarks.
+
+import datetime
+import random
+
+# The COCO foods the detector can actually produce
+FOODS = ["pizza", "hot dog", "donut", "cake", "sandwich", "apple", "banana", "orange", "carrot", "broccoli"]
+
+
+def synthetic_profiles(users, seed=42):
+    rng = random.Random(seed)
+    return {
+        f"user{u}": {"age": rng.randint(18, 70), "gender": rng.choice(["Male", "Female"]),
+                     "height": float(rng.randint(150, 200)), "weight": float(rng.randint(45, 120)),
+                     "goal": rng.choice(["lose", "maintain", "gain"])}
+        for u in range(users)
+    }
+
+
+def synthetic_entries(count, users=500, seed=42, days=365, end=None):
+    """
+    Yield `count` tracker log entries from `users` users, evenly spaced in
+    time over `days` days up to `end` (default: now), oldest first
+    """
+    from calorie_database import calorie_data
+
+    calories = {food: calorie_data[food] for food in FOODS}
+    rng = random.Random(seed)
+    profiles = synthetic_profiles(users, seed)
+    end = end or datetime.datetime.now().replace(microsecond=0)
+    step = datetime.timedelta(days=days) / max(count, 1)
+    start = end - step * count
+    for i in range(count):
+        user = f"user{rng.randrange(users)}"
+        foods = [rng.choice(FOODS)] * rng.randint(1, 4) + [rng.choice(FOODS)] * rng.randint(0, 2)
+        yield {
+            "timestamp": (start + step * (i + 1)).strftime("%Y-%m-%d %H:%M:%S"),
+            "user": user,
+            "profile": profiles[user],
+            "foods": foods,
+            "total_calories": sum(calories[f] for f in foods),
+            "daily_goal": 2500,
+        }
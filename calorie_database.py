@@ -1,14 +1,31 @@
 # calorie_database.py
 
-calorie_data = {
-    "pizza": 266,          # per slice
-    "hot dog": 150,        # 1 piece
-    "donut": 195,          # 1 piece
-    "cake": 300,           # 1 slice
-    "sandwich": 250,       # 1 standard sandwich
-    "apple": 95,
-    "banana": 105,
-    "orange": 62,
-    "carrot": 25,
-    "broccoli": 55,
-}
+from collections.abc import Mapping
+
+from nutrition_db import get_nutrition_db
+
+
+class CalorieTable(Mapping):
+    """
+    Read-only food -> kcal per portion view of the nutrition database.
+    Aliases resolve to their food ("doughnut" -> donut's calories).
+    """
+
+    def __getitem__(self, name):
+        food = get_nutrition_db().lookup(name)
+        if food is None:
+            raise KeyError(name)
+        return food.calories
+
+    def __contains__(self, name):
+        return isinstance(name, str) and get_nutrition_db().lookup(name) is not None
+
+    def __iter__(self):
+        return iter(get_nutrition_db().names())
+
+    def __len__(self):
+        return len(get_nutrition_db())
+
+
+# Kept for existing callers; the data itself lives in nutrition_data.csv
+calorie_data = CalorieTable()
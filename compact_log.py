@@ -0,0 +1,139 @@
+# compact_log.py
+
+import datetime
+import math
+from array import array
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+class CompactLog:
+    """
+    Column-oriented, in-memory copy of the food log.
+
+    Each entry is one row across typed arrays instead of a nested dict:
+    user names are interned, identical profile snapshots share one row in
+    a profiles table, and foods are stored as run-length (food_id, count)
+    pairs, so their original order is kept. Rows convert back to the JSON
+    entry format on access.
+    """
+
+    __slots__ = (
+        "users", "_user_ids", "profiles", "_profile_ids", "foods", "_food_ids",
+        "timestamp", "user", "profile", "calories", "goal",
+        "food_start", "food_id", "food_count",
+    )
+
+    def __init__(self, entries=()):
+        self.users = []           # user id -> name
+        self._user_ids = {}
+        self.profiles = []        # profile id -> profile dict
+        self._profile_ids = {}
+        self.foods = []           # food id -> name
+        self._food_ids = {}
+
+        self.timestamp = array("q")   # seconds since 1970-01-01, naive local time
+        self.user = array("i")
+        self.profile = array("i")     # -1 when the entry has no profile
+        self.calories = array("d")
+        self.goal = array("d")        # NaN when the entry has no daily_goal
+        self.food_start = array("i", [0])  # row i's foods are food_start[i]:food_start[i + 1]
+        self.food_id = array("i")
+        self.food_count = array("i")
+
+        for entry in entries:
+            self.append(entry)
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    @staticmethod
+    def _intern(key, table, ids, value):
+        index = ids.get(key)
+        if index is None:
+            index = ids[key] = len(table)
+            table.append(value)
+        return index
+
+    def append(self, entry):
+        """
+        Add one JSON-format entry; returns its row number. Every field is
+        checked before any column grows, so a malformed entry raises
+        (KeyError, TypeError or ValueError) without leaving a partial row.
+        """
+        ts = datetime.datetime.fromisoformat(entry["timestamp"])
+        user = entry["user"]
+        if not isinstance(user, str):
+            raise TypeError(f"user must be a string, not {type(user).__name__}")
+        profile = entry.get("profile")
+        profile_key = None
+        if profile is not None:
+            if not isinstance(profile, dict):
+                raise TypeError("profile must be a dict")
+            profile_key = tuple(profile.items())
+            hash(profile_key)  # Unhashable values cannot be interned
+        calories = float(entry["total_calories"])
+        goal = float(entry.get("daily_goal", math.nan))
+        foods = entry["foods"]
+        if not isinstance(foods, list) or not all(isinstance(food, str) for food in foods):
+            raise TypeError("foods must be a list of strings")
+
+        self.timestamp.append(int((ts - _EPOCH).total_seconds()))
+        self.user.append(self._intern(user, self.users, self._user_ids, user))
+        if profile is None:
+            self.profile.append(-1)
+        else:
+            self.profile.append(self._intern(profile_key, self.profiles, self._profile_ids, profile))
+        self.calories.append(calories)
+        self.goal.append(goal)
+
+        start = len(self.food_id)
+        for food in foods:
+            food_id = self._intern(food, self.foods, self._food_ids, food)
+            if len(self.food_id) > start and self.food_id[-1] == food_id:
+                self.food_count[-1] += 1  # Same food again: extend the run
+            else:
+                self.food_id.append(food_id)
+                self.food_count.append(1)
+        self.food_start.append(len(self.food_id))
+        return len(self.timestamp) - 1
+
+    def timestamp_str(self, i):
+        return (_EPOCH + datetime.timedelta(seconds=self.timestamp[i])).strftime("%Y-%m-%d %H:%M:%S")
+
+    def profile_of(self, i):
+        index = self.profile[i]
+        return self.profiles[index] if index >= 0 else None
+
+    def foods_of(self, i):
+        foods = []
+        for j in range(self.food_start[i], self.food_start[i + 1]):
+            foods.extend([self.foods[self.food_id[j]]] * self.food_count[j])
+        return foods
+
+    def __getitem__(self, i):
+        """
+        Rebuild row i as a JSON-format entry dict
+        """
+        if i < 0:
+            i += len(self)
+        entry = {"timestamp": self.timestamp_str(i), "user": self.users[self.user[i]]}
+        profile = self.profile_of(i)
+        if profile is not None:
+            entry["profile"] = dict(profile)
+        entry["foods"] = self.foods_of(i)
+        entry["total_calories"] = plain_number(self.calories[i])
+        if not math.isnan(self.goal[i]):
+            entry["daily_goal"] = plain_number(self.goal[i])
+        return entry
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def plain_number(value):
+    """
+    A stored float as it was logged: int when it has no fractional part
+    """
+    return int(value) if value.is_integer() else value
@@ -0,0 +1,159 @@
+# daily_totals.py
+
+import itertools
+import json
+import math
+import sqlite3
+import threading
+from collections import Counter
+
+from log_store import get_log_store
+
+# === Aggregate store location
+TOTALS_FILE = "tracker_totals.db"
+SYNC_CHUNK_SIZE = 10000  # Log entries read and folded in per transaction
+
+
+class DailyTotals:
+    """
+    Materialized per-user, per-day totals (calories, entry count, food counts).
+
+    The log store cursor the aggregates have been built up to is saved in the
+    same transaction as the rows, so sync() applies every entry exactly once,
+    even across crashes and multiple processes. rebuild() recomputes
+    everything from the raw log.
+    """
+
+    def __init__(self, store, path=TOTALS_FILE):
+        self.store = store
+        self.path = path
+        self.cursor_key = f"cursor:{type(store).__name__}:{getattr(store, 'path', '')}"
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS daily_totals (
+                user TEXT NOT NULL,
+                day TEXT NOT NULL,
+                calories REAL NOT NULL,
+                entries INTEGER NOT NULL,
+                foods TEXT NOT NULL,
+                PRIMARY KEY (user, day)
+            )
+        """)
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _cursor(self, conn):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (self.cursor_key,)).fetchone()
+        return row[0] if row else 0
+
+    def _read_chunk(self, cursor, chunk_size):
+        entries = []
+        scan = self.store.scan_since(cursor)
+        try:
+            for entry, cursor in itertools.islice(scan, chunk_size):
+                entries.append(entry)
+        finally:
+            scan.close()
+        return entries, cursor
+
+    def sync(self, chunk_size=SYNC_CHUNK_SIZE):
+        """
+        Fold entries appended since the last sync into the aggregates, at
+        most `chunk_size` per transaction so a large backlog is never held
+        in memory at once. The write lock is only taken when the store has
+        something new past the saved cursor. Returns the number of entries applied.
+        """
+        conn = self._conn()
+        applied = 0
+        while True:
+            cursor = self._cursor(conn)
+            entries, end = self._read_chunk(cursor, chunk_size)
+            if not entries:
+                return applied
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._cursor(conn) != cursor:  # Another process applied them first
+                    conn.execute("ROLLBACK")
+                    continue
+                self._apply(conn, entries)
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                             (self.cursor_key, end))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            applied += len(entries)
+            if len(entries) < chunk_size:
+                return applied
+
+    @staticmethod
+    def _apply(conn, entries):
+        # Group in memory first so each (user, day) row is written once
+        groups = {}
+        for entry in entries:
+            try:
+                key = (str(entry["user"]), str(entry["timestamp"])[:10])
+                entry_calories = float(entry["total_calories"])
+                entry_foods = [str(food) for food in entry["foods"]]
+            except (KeyError, TypeError, ValueError):
+                # A malformed entry must not wedge the cursor for everyone else
+                print(f"⚠️ Skipping malformed log entry in daily totals: {entry!r:.200}")
+                continue
+            if not math.isfinite(entry_calories):
+                entry_calories = 0.0
+            calories, count, foods = groups.get(key, (0, 0, Counter()))
+            foods.update(entry_foods)
+            groups[key] = (calories + entry_calories, count + 1, foods)
+
+        for (user, day), (calories, count, foods) in groups.items():
+            row = conn.execute("SELECT calories, entries, foods FROM daily_totals WHERE user = ? AND day = ?",
+                               (user, day)).fetchone()
+            if row:
+                calories += row[0]
+                count += row[1]
+                foods.update(json.loads(row[2]))
+            conn.execute("INSERT OR REPLACE INTO daily_totals (user, day, calories, entries, foods) "
+                         "VALUES (?, ?, ?, ?, ?)", (user, day, calories, count, json.dumps(foods)))
+
+    def rebuild(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM daily_totals")
+        conn.execute("DELETE FROM meta WHERE key = ?", (self.cursor_key,))
+        conn.execute("COMMIT")
+        return self.sync()
+
+    def get(self, name, day):
+        """
+        Return {"calories", "entries", "foods"} for one user and ISO date
+        """
+        self.sync()
+        row = self._conn().execute("SELECT calories, entries, foods FROM daily_totals WHERE user = ? AND day = ?",
+                                   (name, day)).fetchone()
+        if row is None:
+            return {"calories": 0, "entries": 0, "foods": {}}
+        return {"calories": row[0], "entries": row[1], "foods": json.loads(row[2])}
+
+
+_totals = None
+_totals_lock = threading.Lock()
+
+
+def get_daily_totals():
+    """
+    Return the process-wide aggregates over the default log store
+    """
+    global _totals
+    with _totals_lock:
+        if _totals is None:
+            _totals = DailyTotals(get_log_store())
+        return _totals
@@ -0,0 +1,115 @@
+# detection_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# === Cache location and size bound
+DETECTION_CACHE_FILE = "detection_cache.db"
+MAX_ENTRIES = int(os.environ.get("DIET_DETECTION_CACHE_SIZE", "10000"))
+EVICT_EVERY = 100  # Inserts between size checks
+
+
+class DetectionCache:
+    """
+    Persistent detection results keyed by image content hash, model and
+    confidence threshold. Least recently used entries are evicted once the
+    cache grows past max_entries.
+    """
+
+    def __init__(self, path=DETECTION_CACHE_FILE, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._inserts = 0
+        self._local = threading.local()
+        self._conn().execute("""
+            CREATE TABLE IF NOT EXISTS detections (
+                key TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn().execute("CREATE INDEX IF NOT EXISTS idx_last_used ON detections (last_used)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(image_bytes, model_id, conf_threshold, shape=None):
+        """
+        image_bytes is any buffer; pass shape for raw pixel arrays
+        """
+        digest = hashlib.sha256()
+        if shape is not None:
+            digest.update(repr(tuple(shape)).encode("ascii"))
+        digest.update(image_bytes)
+        return f"{digest.hexdigest()}|{model_id}|{conf_threshold:.3f}"
+
+    def get(self, key):
+        """
+        Return the cached detections dict for key, or None on a miss
+        """
+        conn = self._conn()
+        row = conn.execute("SELECT data FROM detections WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        conn.execute("UPDATE detections SET last_used = ? WHERE key = ?", (time.time(), key))
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, detections):
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO detections (key, data, last_used) VALUES (?, ?, ?)",
+                     (key, json.dumps(detections), time.time()))
+        self._inserts += 1
+        if self._inserts % EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self):
+        """
+        Drop least recently used entries beyond max_entries
+        """
+        self._conn().execute(
+            "DELETE FROM detections WHERE key IN ("
+            "SELECT key FROM detections ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        entries = self._conn().execute("SELECT COUNT(*) FROM detections").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_detection_cache():
+    """
+    Return the process-wide detection cache, or None if disabled
+    with DIET_DETECTION_CACHE=0
+    """
+    global _cache
+    if os.environ.get("DIET_DETECTION_CACHE", "1") == "0":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = DetectionCache()
+        return _cache
@@ -0,0 +1,260 @@
+# detection_service.py
+#
+# Detection served by a pool of worker processes, each with its own warmed
+# model, fed from a bounded multiprocessing queue:
+#
+#   with DetectionService(workers=4) as service:
+#       foods = service.detect("assets/captured_food.jpg", timeout=5)
+#
+# Run this file directly for a throughput test on the bundled images.
+
+import argparse
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import cv2
+import numpy as np
+
+from postprocess import build_food_lookup, filter_food, food_labels
+
+# === Defaults
+CONF_THRESHOLD = 0.25
+MAX_PENDING = 64        # Queued requests before submit() pushes back
+BATCH_WINDOW = 0.01     # Seconds a worker waits to grow a micro-batch
+MAX_BATCH = 8
+
+
+class ServiceBusy(Exception):
+    """
+    Raised when the request queue is full
+    """
+
+
+def _worker_main(requests, results, conf_threshold, batch_window, max_batch, threads):
+    from model_registry import get_backend
+
+    backend = get_backend(threads=threads)
+    lookup = build_food_lookup(backend.names)
+    backend.predict([np.zeros((64, 64, 3), dtype=np.uint8)], conf_threshold)  # Warm-up
+    results.put(("ready", None, None))
+
+    stopping = False
+    while not stopping:
+        item = requests.get()
+        if item is None:
+            break
+
+        # Micro-batch: pick up whatever else arrives within the window
+        batch = [item]
+        window_end = time.monotonic() + batch_window
+        while len(batch) < max_batch:
+            remaining = window_end - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                stopping = True
+                break
+            batch.append(item)
+
+        now = time.time()
+        images, ids = [], []
+        for request_id, data, deadline in batch:
+            if deadline < now:
+                results.put((request_id, None, "timed out in queue"))
+                continue
+            image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                results.put((request_id, None, "could not decode image"))
+                continue
+            images.append(image)
+            ids.append(request_id)
+
+        if not images:
+            continue
+        try:
+            outputs = backend.predict(images, conf_threshold)
+        except Exception as e:
+            for request_id in ids:
+                results.put((request_id, None, f"inference failed: {e}"))
+            continue
+        for request_id, data in zip(ids, outputs):
+            results.put((request_id, food_labels(filter_food(data, lookup)), None))
+
+
+class DetectionService:
+    """
+    Process pool wrapping food detection.
+
+    submit() enqueues encoded image bytes (or a path) and returns a Future that
+    resolves to the detected food labels. When MAX_PENDING requests are already
+    queued, submit() raises ServiceBusy instead of letting latency grow without
+    bound. Requests still queued after their timeout are dropped by the worker.
+    Each worker gets an equal share of the CPU cores for its intra-op threads.
+    If a worker dies, every pending request fails rather than waiting forever.
+    """
+
+    def __init__(self, workers=None, conf_threshold=CONF_THRESHOLD, max_pending=MAX_PENDING,
+                 batch_window=BATCH_WINDOW, max_batch=MAX_BATCH):
+        self.workers = workers or os.cpu_count() or 1
+        threads = max(1, (os.cpu_count() or 1) // self.workers)  # No oversubscription across workers
+        ctx = mp.get_context("spawn")  # Fresh interpreters: no forked torch state
+        self._requests = ctx.Queue(maxsize=max_pending)
+        self._results = ctx.Queue()
+        self._processes = [
+            ctx.Process(target=_worker_main, name=f"detector-{i}", daemon=True,
+                        args=(self._requests, self._results, conf_threshold, batch_window, max_batch, threads))
+            for i in range(self.workers)
+        ]
+        self._futures = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._ready = threading.Semaphore(0)
+        self._stopping = False
+        self._exited = set()
+        self._collector = threading.Thread(target=self._collect, name="detector-results", daemon=True)
+
+    def start(self, wait=True):
+        for process in self._processes:
+            process.start()
+        self._collector.start()
+        if wait:
+            ready = 0
+            while ready < len(self._processes):
+                if self._ready.acquire(timeout=0.5):
+                    ready += 1
+                elif not all(process.is_alive() for process in self._processes):
+                    self.stop()
+                    raise RuntimeError("A detector worker exited during startup")
+        return self
+
+    def _fail_pending(self, reason):
+        with self._lock:
+            futures, self._futures = list(self._futures.values()), {}
+        for future in futures:
+            if not future.done():
+                future.set_exception(RuntimeError(reason))
+
+    def _collect(self):
+        while True:
+            try:
+                request_id, foods, error = self._results.get(timeout=0.5)
+            except queue.Empty:
+                # A crashed worker takes its requests with it: fail them all
+                # instead of leaving callers waiting on futures nobody resolves
+                for process in self._processes:
+                    if process.exitcode is not None and process.name not in self._exited:
+                        self._exited.add(process.name)
+                        if not self._stopping:
+                            self._fail_pending(f"detector worker {process.name} exited with code {process.exitcode}")
+                continue
+            if request_id is None:
+                return
+            if request_id == "ready":
+                self._ready.release()
+                continue
+            with self._lock:
+                future = self._futures.pop(request_id, None)
+            if future is None or future.done():
+                continue
+            if error is None:
+                future.set_result(foods)
+            else:
+                future.set_exception(RuntimeError(error))
+
+    def submit(self, image, timeout=10.0, block=0.0):
+        """
+        Queue one image (path or encoded bytes). Waits up to `block` seconds
+        for queue space before raising ServiceBusy.
+        """
+        if isinstance(image, (str, os.PathLike)):
+            with open(image, "rb") as f:
+                image = f.read()
+        if self._stopping or not any(process.is_alive() for process in self._processes):
+            raise RuntimeError("Detection service is not running")
+
+        future = Future()
+        request_id = next(self._ids)
+        with self._lock:
+            self._futures[request_id] = future
+        try:
+            self._requests.put((request_id, image, time.time() + timeout), timeout=block or None,
+                               block=block > 0)
+        except queue.Full:
+            with self._lock:
+                self._futures.pop(request_id, None)
+            raise ServiceBusy(f"{self._requests.qsize()} requests already queued")
+        return future
+
+    def detect(self, image, timeout=10.0):
+        """
+        Blocking helper: submit and wait. Raises concurrent.futures.TimeoutError
+        after `timeout` seconds and RuntimeError if the worker rejected the request.
+        """
+        return self.submit(image, timeout).result(timeout)
+
+    def stop(self, timeout=5.0):
+        """
+        Ask the workers to finish, terminating any that do not within
+        `timeout` seconds (e.g. the queue is full or a worker hangs).
+        Requests still pending fail with RuntimeError.
+        """
+        self._stopping = True
+        for _ in self._processes:
+            try:
+                self._requests.put(None, timeout=timeout / len(self._processes))
+            except queue.Full:
+                break
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            if process.pid is not None:
+                process.join(timeout=max(0.0, deadline - time.monotonic()))
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=1)
+        if self._collector.is_alive():
+            self._results.put((None, None, None))
+            self._collector.join(timeout=5)
+        self._fail_pending("Detection service stopped")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detection service throughput test")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--image", default=os.path.join("assets", "captured_food.jpg"))
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        data = f.read()
+
+    with DetectionService(workers=args.workers) as service:
+        start = time.perf_counter()
+        futures = []
+        for _ in range(args.requests):
+            futures.append(service.submit(data, timeout=30, block=30))
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+
+    print(f"✅ {args.requests} requests on {args.workers} workers: "
+          f"{args.requests / elapsed:.1f} img/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# detector_backend.py
+
+import ast
+import os
+
+import cv2
+import numpy as np
+
+from instrumentation import span
+
+# === Backend selection: "torch" (default), "onnx" or "onnx-int8"
+DETECTOR_BACKEND = os.environ.get("DIET_DETECTOR_BACKEND", "torch")
+DETECTOR_THREADS = int(os.environ.get("DIET_DETECTOR_THREADS", "0"))  # 0 = library default
+
+IOU_THRESHOLD = 0.7  # Same NMS threshold ultralytics uses by default
+
+
+class TorchBackend:
+    """
+    The ultralytics PyTorch model, shared through model_registry
+    """
+
+    def __init__(self, weights, threads=0):
+        from model_registry import get_model
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        self.model = get_model(weights)
+        self.names = self.model.names
+        self.model_id = os.path.basename(weights)
+
+    def predict(self, images, conf_threshold, imgsz=None):
+        """
+        Run a batch of BGR images, at input size `imgsz` (default: the
+        model's own); returns one (N, 6) array of x1, y1, x2, y2, score,
+        class_id per image
+        """
+        options = {"imgsz": imgsz} if imgsz else {}
+        results = self.model(list(images), conf=conf_threshold, verbose=False, **options)
+        return [result.boxes.data.cpu().numpy() for result in results]
+
+
+def letterbox(image, size):
+    """
+    Resize keeping aspect ratio and pad to size x size, the way YOLO expects.
+    Returns (padded image, scale, pad_x, pad_y).
+    """
+    h, w = image.shape[:2]
+    scale = min(size / h, size / w)
+    new_w, new_h = round(w * scale), round(h * scale)
+    pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+    padded = np.full((size, size, 3), 114, dtype=np.uint8)
+    padded[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(
+        image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    return padded, scale, pad_x, pad_y
+
+
+class OnnxBackend:
+    """
+    Exported YOLOv8 graph run through ONNX Runtime on the CPU, with
+    letterboxing and NMS done here instead of in ultralytics/torch.
+    """
+
+    def __init__(self, onnx_path, threads=0, imgsz=640):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.imgsz = imgsz
+        self.model_id = os.path.basename(onnx_path)
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(metadata["names"])
+
+    def predict(self, images, conf_threshold, imgsz=None):
+        # The graph is exported with dynamic axes, so any multiple of 32 works
+        with span("backend.preprocess"):
+            prepared = [letterbox(image, imgsz or self.imgsz) for image in images]
+            blob = np.stack([padded[..., ::-1].transpose(2, 0, 1) for padded, *_ in prepared])
+            blob = np.ascontiguousarray(blob, dtype=np.float32) / 255.0
+        with span("backend.run"):
+            outputs = self.session.run(None, {self.input_name: blob})[0]  # (B, 4 + classes, anchors)
+        with span("backend.nms"):
+            return [self._decode(pred.T, conf_threshold, *letter[1:])
+                    for pred, letter in zip(outputs, prepared)]
+
+    @staticmethod
+    def _decode(pred, conf_threshold, scale, pad_x, pad_y):
+        scores = pred[:, 4:]
+        class_ids = scores.argmax(axis=1)
+        conf = scores[np.arange(len(scores)), class_ids]
+        keep = conf >= conf_threshold
+        pred, class_ids, conf = pred[keep], class_ids[keep], conf[keep]
+        if not len(pred):
+            return np.empty((0, 6), dtype=np.float32)
+
+        # cx, cy, w, h in letterboxed pixels -> x, y, w, h in original pixels
+        xywh = pred[:, :4].copy()
+        xywh[:, 0] = (xywh[:, 0] - xywh[:, 2] / 2 - pad_x) / scale
+        xywh[:, 1] = (xywh[:, 1] - xywh[:, 3] / 2 - pad_y) / scale
+        xywh[:, 2:] /= scale
+        idx = np.asarray(cv2.dnn.NMSBoxesBatched(
+            xywh.tolist(), conf.tolist(), class_ids.tolist(), conf_threshold, IOU_THRESHOLD),
+            dtype=np.intp).reshape(-1)
+
+        out = np.empty((len(idx), 6), dtype=np.float32)
+        out[:, 0:2] = xywh[idx, 0:2]
+        out[:, 2:4] = xywh[idx, 0:2] + xywh[idx, 2:4]
+        out[:, 4] = conf[idx]
+        out[:, 5] = class_ids[idx]
+        return out
+
+
+def export_onnx(weights, int8=False, imgsz=640):
+    """
+    Export YOLO weights to ONNX (once) and optionally quantize to int8.
+    Returns the .onnx path.
+    """
+    stem = os.path.splitext(weights)[0]
+    onnx_path = stem + ".onnx"
+    if not os.path.exists(onnx_path):
+        from model_registry import get_model
+        get_model(weights).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+    if not int8:
+        return onnx_path
+
+    int8_path = stem + "-int8.onnx"
+    if not os.path.exists(int8_path):
+        import onnx
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QUInt8)
+
+        # Carry over the class names and other export metadata
+        source, quantized = onnx.load(onnx_path), onnx.load(int8_path)
+        onnx.helper.set_model_props(quantized, {p.key: p.value for p in source.metadata_props})
+        onnx.save(quantized, int8_path)
+    return int8_path
+
+
+def create_backend(name, weights, threads=0):
+    if name == "torch":
+        return TorchBackend(weights, threads)
+    if name in ("onnx", "onnx-int8"):
+        return OnnxBackend(export_onnx(weights, int8=name == "onnx-int8"), threads)
+    raise ValueError(f"Unknown detector backend: {name!r}")
@@ -71,12 +71,18 @@
 
 # food_detector.py
 
-from ultralytics import YOLO
 import cv2
+import json
+import math
 from calorie_database import calorie_data
-
-# === Load YOLOv8 model ===
-model = YOLO("yolov8n.pt")
+from frame_sources import WebcamSource
+from frame_stream import BoxTracker, MotionDetector, StreamStats, frame_reader
+from instrumentation import span
+from nutrition_db import FoodNames
+from model_registry import get_backend, get_model
+from portion import PortionEstimator
+from postprocess import as_boxes, build_food_lookup, filter_food
+from roi import DETECT_ROI, LATENCY_BUDGET_MS, AdaptiveBackend
 
 # === COCO class names ===
 class_names = [
@@ -91,42 +97,174 @@ class_names = [
     "refrigerator", "book", "clock", "vase", "scissors", "teddy bear", "hair drier", "toothbrush"
 ]
 
-# Only allow food classes that exist in calorie database
-FOOD_CLASSES = set(calorie_data.keys())
+# Only allow food classes that exist in the nutrition database (checked lazily)
+FOOD_CLASSES = FoodNames()
+
+# Class id -> food id lookup, built once
+FOOD_LOOKUP = build_food_lookup(class_names)
+
+# Portion size from box area next to a bowl / cup / fork / table
+PORTIONS = PortionEstimator(class_names)
+
+
+def __getattr__(name):
+    # Keep `food_detector.model` working without loading YOLO at import time
+    if name == "model":
+        return get_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _food_detections(backend, frame, conf_threshold):
+    """
+    Run the detector on one frame. Returns confident food detections as a
+    structured array (see postprocess.DETECTION_DTYPE) and the frame's
+    pixels-per-cm scale from any reference object (NaN if none)
+    """
+    with span("inference"):
+        data = backend.predict([frame], conf_threshold)[0]
+    with span("postprocess"):
+        return filter_food(data, FOOD_LOOKUP, conf_threshold), PORTIONS.pixels_per_cm(data)
+
+
+def _draw_detections(frame, boxes, portions):
+    for (x1, y1, x2, y2, score, class_id), portion in zip(boxes, portions):
+        label = class_names[int(class_id)].lower()
+        calories = round(calorie_data[label] * portion)
+        display_text = f"{label.title()} | {calories} kcal"
+        if portion != 1:
+            display_text += f" (x{portion:.1f})"
+
+        # Draw bounding box and text
+        cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 2)
+        cv2.putText(frame, display_text, (int(x1), int(y1) - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+
+
+class WindowSink:
+    """
+    Shows annotated frames in an OpenCV window; stops when 'q' is pressed
+    """
+
+    def __init__(self, title="🍱 Smart Diet Tracker - Food Detection", show_stats=False):
+        self.title = title
+        self.show_stats = show_stats
+
+    def show(self, frame, boxes, portions, stats, detected):
+        with span("draw"):
+            _draw_detections(frame, boxes, portions)
+        if self.show_stats:
+            mean, _ = stats.latency_ms()
+            cv2.putText(frame, f"{stats.fps():.1f} fps | {mean:.0f} ms", (10, 25),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+        cv2.imshow(self.title, frame)
+        return not (cv2.waitKey(1) & 0xFF == ord('q'))
+
+    def close(self):
+        cv2.destroyAllWindows()
+
+
+class HeadlessSink:
+    """
+    No window: records each frame's detections instead, in `records` or,
+    if `path` is given, as JSON lines in that file.
+    """
+
+    def __init__(self, path=None):
+        self.records = []
+        self.frames = 0
+        self._file = open(path, "w", encoding="utf-8") if path else None
+
+    def show(self, frame, boxes, portions, stats, detected):
+        record = {
+            "frame": self.frames,
+            "detected": bool(detected),
+            "foods": [class_names[int(class_id)].lower() for class_id in boxes[:, 5]],
+            "boxes": [[round(float(v), 1) for v in box[:4]] for box in boxes],
+            "scores": [round(float(score), 3) for score in boxes[:, 4]],
+            "portions": [round(float(portion), 2) for portion in portions],
+        }
+        self.frames += 1
+        if self._file is not None:
+            self._file.write(json.dumps(record) + "\n")
+        else:
+            self.records.append(record)
+        return True
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
 
-def detect_food_from_webcam(conf_threshold=0.5):
-    cap = cv2.VideoCapture(0)
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
+def detect_food_stream(source, sink, conf_threshold=0.5, detect_every=1, motion_threshold=None,
+                       max_frames=None, roi=None, latency_budget_ms=None):
+    """
+    Food detection over a stream of frames from `source` (see frame_sources),
+    handed to `sink` (WindowSink or HeadlessSink).
 
-        results = model(frame)[0]
+    Capture runs on its own thread: live cameras keep only the newest frame,
+    replay sources are read ahead without dropping any. YOLO runs every
+    `detect_every` frames, or sooner if `motion_threshold` is set and the
+    frame differs from the last detected one by more than that (mean
+    grey-level difference). In between, boxes are carried forward by a
+    lightweight tracker. Returns latency / fps stats for the session.
 
-        for result in results.boxes.data.tolist():
-            x1, y1, x2, y2, score, class_id = result
-            if score < conf_threshold:
-                continue
+    `roi` ("objects" or "saliency") runs YOLO on the meal region only, and
+    `latency_budget_ms` picks its input size to fit (see roi.py; both
+    default to DIET_DETECT_ROI / DIET_LATENCY_BUDGET_MS).
+    """
+    backend = get_backend()
+    roi = DETECT_ROI if roi is None else roi
+    latency_budget_ms = LATENCY_BUDGET_MS if latency_budget_ms is None else latency_budget_ms
+    if roi or latency_budget_ms:
+        backend = AdaptiveBackend(backend, roi, latency_budget_ms)  # This stream's own region state
+    reader = frame_reader(source)
+    motion = MotionDetector(motion_threshold) if motion_threshold is not None else None
+    tracker = BoxTracker()
+    stats = StreamStats()
+    since_detect = detect_every  # Detect on the first frame
+    scale = float("nan")  # Last known pixels per cm; references rarely move between detections
 
-            class_id = int(class_id)
-            label = class_names[class_id].lower()
+    try:
+        while max_frames is None or stats.frames < max_frames:
+            with span("capture"):
+                item = reader.read()
+            if item is None:
+                break
+            frame, captured_at = item
 
-            # Skip if not in our calorie database
-            if label not in FOOD_CLASSES:
-                continue
+            detect = since_detect >= detect_every or (motion is not None and motion.moved(frame))
+            if detect:
+                detections, frame_scale = _food_detections(backend, frame, conf_threshold)
+                if not math.isnan(frame_scale):
+                    scale = frame_scale
+                boxes = tracker.update(as_boxes(detections), since_detect)
+                if motion is not None:
+                    motion.set_reference(frame)
+                since_detect = 0
+            else:
+                boxes = tracker.predict()
+            since_detect += 1
 
-            calories = calorie_data[label]
-            display_text = f"{label.title()} | {calories} kcal"
+            keep_going = sink.show(frame, boxes, PORTIONS.portions(boxes, scale), stats, detect)
+            stats.record(captured_at, detect)
+            if not keep_going:
+                break
+    finally:
+        reader.stop()
+        source.release()
+        sink.close()
 
-            # Draw bounding box and text
-            cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 2)
-            cv2.putText(frame, display_text, (int(x1), int(y1) - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+    summary = stats.summary()
+    print(f"📊 {summary['fps']} fps ({summary['sustained_fps']} sustained) | latency "
+          f"{summary['latency_ms_mean']} ms (p95 {summary['latency_ms_p95']} ms) | detector ran on "
+          f"{summary['detector_runs']}/{summary['frames']} frames")
+    return summary
 
-        cv2.imshow("🍱 Smart Diet Tracker - Food Detection", frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
 
-    cap.release()
-    cv2.destroyAllWindows()
+def detect_food_from_webcam(conf_threshold=0.5, detect_every=1, motion_threshold=None, show_stats=False):
+    """
+    Live food detection from the webcam in a window (see detect_food_stream)
+    """
+    return detect_food_stream(WebcamSource(0), WindowSink(show_stats=show_stats), conf_threshold,
+                              detect_every, motion_threshold)
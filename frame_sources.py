@@ -0,0 +1,190 @@
+# frame_sources.py
+#
+# Where frames come from. Every source has the cv2.VideoCapture read() /
+# release() interface, so the capture and detection loops do not care
+# whether they are fed by a camera or replaying recorded meals:
+#
+#   0, webcam:1          live camera
+#   meal.mp4             video file
+#   photos/              directory of images, in name order
+#   synthetic, synthetic:500   generated plate scenes (for CI / load tests)
+
+import glob
+import os
+import threading
+
+import cv2
+import numpy as np
+
+# === Default camera ("0" = first webcam); DIET_CAMERA_SOURCE=meal.mp4 replays instead
+CAMERA_SOURCE = os.environ.get("DIET_CAMERA_SOURCE", "0")
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+class FrameSource:
+    """
+    Base class. `live` sources produce frames in real time whether or not
+    anyone reads them, so readers may drop frames; replay sources wait for
+    the reader and every frame should be processed.
+    """
+
+    live = False
+    fps = 0.0
+
+    def read(self):
+        """
+        Return (ok, frame) like cv2.VideoCapture.read; ok is False at the end
+        """
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+    def __iter__(self):
+        while True:
+            ok, frame = self.read()
+            if not ok:
+                return
+            yield frame
+
+
+class WebcamSource(FrameSource):
+    live = True
+
+    def __init__(self, index=0):
+        self.capture = cv2.VideoCapture(index)
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+
+    def read(self):
+        return self.capture.read()
+
+    def release(self):
+        self.capture.release()
+
+
+class VideoFileSource(FrameSource):
+    """
+    Frames of a recorded video, as fast as they can be decoded
+    """
+
+    def __init__(self, path, loop=False):
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise ValueError(f"Could not open video {path}")
+        self.path = path
+        self.loop = loop
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+
+    def read(self):
+        ok, frame = self.capture.read()
+        if not ok and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.capture.read()
+        return ok, frame
+
+    def release(self):
+        self.capture.release()
+
+
+class ImageDirSource(FrameSource):
+    """
+    Every image in a directory, in file name order; unreadable files are skipped
+    """
+
+    def __init__(self, path, loop=False):
+        self.paths = sorted(p for p in glob.glob(os.path.join(path, "*"))
+                            if p.lower().endswith(IMAGE_EXTENSIONS))
+        if not self.paths:
+            raise ValueError(f"No images in {path}")
+        self.loop = loop
+        self.position = 0
+
+    def read(self):
+        misses = 0
+        while misses < len(self.paths):
+            if self.position >= len(self.paths):
+                if not self.loop:
+                    return False, None
+                self.position = 0
+            frame = cv2.imread(self.paths[self.position])
+            self.position += 1
+            if frame is not None:
+                return True, frame
+            misses += 1
+        return False, None
+
+
+class SyntheticSource(FrameSource):
+    """
+    Generated table scenes: a plate with a few coloured blobs on it. A small
+    set of scenes is rendered up front and cycled, so reading costs one copy.
+    `count` frames are produced (None: endless).
+    """
+
+    def __init__(self, count=None, size=(640, 480), variants=8, seed=0):
+        self.count = count
+        self.produced = 0
+        rng = np.random.default_rng(seed)
+        self.scenes = [self._render(rng, size) for _ in range(variants)]
+
+    @staticmethod
+    def _render(rng, size):
+        width, height = size
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[:] = rng.integers(60, 140, 3)  # Table
+        center = (int(width * rng.uniform(0.35, 0.65)), int(height * rng.uniform(0.4, 0.6)))
+        radius = int(min(size) * rng.uniform(0.25, 0.4))
+        cv2.circle(frame, center, radius, (235, 235, 235), -1)  # Plate
+        for _ in range(rng.integers(1, 5)):
+            offset = rng.uniform(-0.5, 0.5, 2) * radius
+            blob = (int(center[0] + offset[0]), int(center[1] + offset[1]))
+            axes = (int(radius * rng.uniform(0.1, 0.3)), int(radius * rng.uniform(0.1, 0.3)))
+            color = tuple(int(c) for c in rng.integers(0, 256, 3))
+            cv2.ellipse(frame, blob, axes, float(rng.uniform(0, 180)), 0, 360, color, -1)
+        return frame
+
+    def read(self):
+        if self.count is not None and self.produced >= self.count:
+            return False, None
+        frame = self.scenes[self.produced % len(self.scenes)].copy()  # Callers may draw on it
+        self.produced += 1
+        return True, frame
+
+
+def open_source(spec, loop=False):
+    """
+    Open a frame source from a spec string (see the top of this file)
+    """
+    spec = str(spec)
+    if spec.isdigit():
+        return WebcamSource(int(spec))
+    if spec.startswith("webcam"):
+        return WebcamSource(int(spec.partition(":")[2] or 0))
+    if spec.startswith("synthetic"):
+        count = spec.partition(":")[2]
+        return SyntheticSource(int(count) if count else None)
+    if os.path.isdir(spec):
+        return ImageDirSource(spec, loop=loop)
+    if os.path.isfile(spec):
+        return VideoFileSource(spec, loop=loop)
+    raise ValueError(f"Unknown frame source: {spec!r}")
+
+
+_camera = None
+_camera_lock = threading.Lock()
+
+
+def open_camera():
+    """
+    Source for single-photo captures, from DIET_CAMERA_SOURCE. Webcams are
+    opened fresh for each capture (release() them after use); a replay
+    source is opened once, loops, and is shared by every capture.
+    """
+    global _camera
+    if CAMERA_SOURCE.isdigit() or CAMERA_SOURCE.startswith("webcam"):
+        return open_source(CAMERA_SOURCE)
+    with _camera_lock:
+        if _camera is None:
+            _camera = open_source(CAMERA_SOURCE, loop=True)
+        return _camera
@@ -0,0 +1,272 @@
+# frame_stream.py
+
+import queue
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+# Enqueued by a reader thread once its source is exhausted
+_END = object()
+
+
+def _next_item(frames, thread):
+    """
+    Block until a reader thread's queue has something. Stalls (a slow camera
+    start, a dropped second) are waited out while the thread is alive;
+    returns None only at the end-of-stream sentinel or if the thread died.
+    """
+    while True:
+        try:
+            item = frames.get(timeout=0.5)
+        except queue.Empty:
+            if thread.is_alive():
+                continue
+            try:
+                item = frames.get_nowait()  # Published just before it exited
+            except queue.Empty:
+                return None
+        return None if item is _END else item
+
+
+class LatestFrameGrabber:
+    """
+    Reads frames from a cv2.VideoCapture on its own thread and keeps only the
+    newest one, so a slow detector always works on a fresh frame.
+    read() returns (frame, capture_time), waiting out stalls, or None once
+    the source is exhausted.
+    """
+
+    def __init__(self, capture):
+        self.capture = capture
+        self._frames = queue.Queue(maxsize=1)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="frame-grabber", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _publish(self, item):
+        try:
+            self._frames.get_nowait()  # Drop the stale frame nobody picked up
+        except queue.Empty:
+            pass
+        self._frames.put_nowait(item)
+
+    def _run(self):
+        while not self._stop.is_set():
+            ret, frame = self.capture.read()
+            if not ret:
+                self._publish(_END)
+                return
+            self._publish((frame, time.perf_counter()))
+
+    def read(self):
+        return _next_item(self._frames, self._thread)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+
+
+class BufferedFrameReader:
+    """
+    Prefetches frames from a replay source (video file, image directory)
+    on its own thread into a bounded queue. Unlike LatestFrameGrabber no
+    frame is ever dropped: the reader waits when the consumer falls behind,
+    so decoding overlaps with detection and every frame is processed once.
+    read() returns (frame, read_time) or None once the source is exhausted.
+    """
+
+    def __init__(self, capture, depth=8):
+        self.capture = capture
+        self._frames = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="frame-reader", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._frames.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _run(self):
+        while True:
+            ret, frame = self.capture.read()
+            if not ret:
+                self._put(_END)
+                return
+            if not self._put((frame, time.perf_counter())):
+                return
+
+    def read(self):
+        return _next_item(self._frames, self._thread)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+
+
+def frame_reader(source):
+    """
+    Threaded reader suited to a frame_sources source: drop stale frames
+    from live cameras, keep every frame of a replay
+    """
+    if getattr(source, "live", True):
+        return LatestFrameGrabber(source).start()
+    return BufferedFrameReader(source).start()
+
+
+class MotionDetector:
+    """
+    Cheap frame-difference check on a tiny grayscale thumbnail
+    """
+
+    def __init__(self, threshold=8.0, size=(64, 48)):
+        self.threshold = threshold
+        self.size = size
+        self.reference = None
+
+    def thumbnail(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def moved(self, frame):
+        """
+        True if frame differs from the last reference by more than threshold
+        (mean absolute grey-level difference)
+        """
+        thumb = self.thumbnail(frame)
+        if self.reference is None:
+            return True
+        return float(np.abs(thumb - self.reference).mean()) > self.threshold
+
+    def set_reference(self, frame):
+        self.reference = self.thumbnail(frame)
+
+
+def iou_matrix(a, b):
+    """
+    Pairwise IoU between two (N, 4+) and (M, 4+) arrays of x1, y1, x2, y2 boxes
+    """
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+
+class BoxTracker:
+    """
+    Carries detections across frames where the detector is skipped.
+
+    Tracks are rows of (x1, y1, x2, y2, score, class_id). On each detection,
+    tracks are matched to new boxes of the same class by IoU and given a
+    per-frame velocity; in between, boxes are moved along that velocity.
+    Tracks not seen for max_age frames are dropped.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_age=30):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.boxes = np.empty((0, 6), dtype=np.float32)
+        self.velocity = np.empty((0, 4), dtype=np.float32)
+        self.age = np.empty(0, dtype=np.int32)
+
+    def update(self, detections, frames_elapsed=1):
+        detections = np.asarray(detections, dtype=np.float32).reshape(-1, 6)
+        velocity = np.zeros((len(detections), 4), dtype=np.float32)
+
+        if len(self.boxes) and len(detections):
+            iou = iou_matrix(detections, self.boxes)
+            iou[detections[:, None, 5] != self.boxes[None, :, 5]] = 0.0
+            used = set()
+            for d in np.argsort(-iou.max(axis=1)):
+                t = int(np.argmax(iou[d]))
+                if iou[d, t] < self.iou_threshold or t in used:
+                    continue
+                used.add(t)
+                # Tracks were already moved forward while skipping, so add the correction
+                step = (detections[d, :4] - self.boxes[t, :4]) / max(frames_elapsed, 1)
+                velocity[d] = self.velocity[t] + step
+
+        self.boxes = detections
+        self.velocity = velocity
+        self.age = np.zeros(len(detections), dtype=np.int32)
+        return self.boxes
+
+    def predict(self):
+        """
+        Advance every track by one frame and return the current boxes
+        """
+        self.boxes[:, :4] += self.velocity
+        self.age += 1
+        alive = self.age <= self.max_age
+        self.boxes, self.velocity, self.age = self.boxes[alive], self.velocity[alive], self.age[alive]
+        return self.boxes
+
+
+class StreamStats:
+    """
+    End-to-end latency (capture -> display) and effective fps over a sliding window
+    """
+
+    def __init__(self, window=120):
+        self.latencies = deque(maxlen=window)
+        self.shown_at = deque(maxlen=window)
+        self.frames = 0
+        self.detections = 0
+        self.started = None
+
+    def record(self, captured_at, detected):
+        now = time.perf_counter()
+        if self.started is None:
+            self.started = captured_at
+        self.latencies.append(now - captured_at)
+        self.shown_at.append(now)
+        self.frames += 1
+        self.detections += int(detected)
+
+    def fps(self):
+        if len(self.shown_at) < 2:
+            return 0.0
+        return (len(self.shown_at) - 1) / (self.shown_at[-1] - self.shown_at[0])
+
+    def sustained_fps(self):
+        """
+        Frames per second over the whole run, from the first capture on
+        """
+        if not self.frames or not self.shown_at:
+            return 0.0
+        return self.frames / max(self.shown_at[-1] - self.started, 1e-9)
+
+    def latency_ms(self):
+        if not self.latencies:
+            return 0.0, 0.0
+        values = np.array(self.latencies) * 1000
+        return float(values.mean()), float(np.percentile(values, 95))
+
+    def summary(self):
+        mean, p95 = self.latency_ms()
+        return {
+            "frames": self.frames,
+            "detector_runs": self.detections,
+            "fps": round(self.fps(), 1),
+            "sustained_fps": round(self.sustained_fps(), 1),
+            "latency_ms_mean": round(mean, 1),
+            "latency_ms_p95": round(p95, 1),
+        }
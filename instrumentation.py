@@ -0,0 +1,225 @@
+# instrumentation.py
+#
+# Timing spans and latency histograms for the hot paths, off by default:
+#
+#   DIET_METRICS=1 python ui_main.py                  # collect
+#   DIET_METRICS_FILE=metrics.json ...                # write a JSON snapshot at exit
+#   DIET_METRICS_PORT=9100 ...                        # serve it on http://127.0.0.1:9100/metrics
+#   DIET_PROFILE=cprofile|pyinstrument ...            # profile blocks wrapped in profiled()
+#
+#   with span("inference"):
+#       ...
+
+import atexit
+import bisect
+import json
+import math
+import os
+import threading
+import time
+
+# === Histogram buckets: upper bounds in ms, ~25% apart from 10 us to ~100 s
+BUCKETS_MS = [0.01 * 1.25 ** i for i in range(73)]
+
+# Exporting implies collecting
+_enabled = (os.environ.get("DIET_METRICS", "0") not in ("", "0")
+            or bool(os.environ.get("DIET_METRICS_FILE")) or bool(os.environ.get("DIET_METRICS_PORT")))
+_histograms = {}
+_lock = threading.Lock()
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram; percentiles are bucket upper bounds
+    """
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, ms):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.min = min(self.min, ms)
+        self.max = max(self.max, ms)
+
+    def percentile(self, q):
+        target = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return min(BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max, self.max)
+        return 0.0
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "min_ms": round(self.min, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+            "max_ms": round(self.max, 3),
+        }
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+
+def record(name, ms):
+    """
+    Add one timing (milliseconds) to the named histogram
+    """
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.record(ms)
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, (time.perf_counter() - self.start) * 1000.0)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """
+    Context manager timing its block into histogram `name`.
+    While metrics are disabled this returns a shared no-op object.
+    """
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+def snapshot():
+    """
+    Return {name: {count, total_ms, mean_ms, min_ms, p50_ms, p95_ms, p99_ms, max_ms}}
+    """
+    with _lock:
+        return {name: histogram.summary() for name, histogram in sorted(_histograms.items())}
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def export_json(path):
+    """
+    Write the current snapshot to a JSON file
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"timestamp": time.time(), "metrics": snapshot()}, f, indent=2)
+    return path
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    """
+    Serve GET /metrics (JSON snapshot) from a daemon thread; returns the server
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = json.dumps(snapshot()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+# === Opt-in profiling
+
+PROFILER = os.environ.get("DIET_PROFILE", "")   # "", "cprofile" or "pyinstrument"
+PROFILE_DIR = os.environ.get("DIET_PROFILE_DIR", "profiles")
+
+
+class profiled:
+    """
+    Profile a block with cProfile or pyinstrument when DIET_PROFILE is set,
+    saving <PROFILE_DIR>/<name>-<time>.prof (or .html). A no-op otherwise.
+    """
+
+    def __init__(self, name, profiler=None):
+        self.name = name
+        self.profiler = PROFILER if profiler is None else profiler
+        self._profile = None
+
+    def __enter__(self):
+        if self.profiler == "cprofile":
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        elif self.profiler == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                raise ImportError("DIET_PROFILE=pyinstrument needs `pip install pyinstrument`")
+            self._profile = Profiler()
+            self._profile.start()
+        elif self.profiler:
+            raise ValueError(f"Unknown profiler: {self.profiler!r}")
+        return self
+
+    def __exit__(self, *exc):
+        if self._profile is None:
+            return
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stem = os.path.join(PROFILE_DIR, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}")
+        if self.profiler == "cprofile":
+            self._profile.disable()
+            self._profile.dump_stats(stem + ".prof")
+        else:
+            self._profile.stop()
+            with open(stem + ".html", "w", encoding="utf-8") as f:
+                f.write(self._profile.output_html())
+        self._profile = None
+
+
+# === Environment-driven exporters
+if os.environ.get("DIET_METRICS_FILE"):
+    atexit.register(export_json, os.environ["DIET_METRICS_FILE"])
+if os.environ.get("DIET_METRICS_PORT"):
+    serve_metrics(int(os.environ["DIET_METRICS_PORT"]))
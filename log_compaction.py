@@ -0,0 +1,206 @@
+# log_compaction.py
+#
+# Compaction and retention for the month-partitioned log
+# (DIET_LOG_BACKEND=partitioned). Runs in the background of every process
+# using that store, or by hand:
+#
+#   python log_compaction.py                      # compress finished months
+#   python log_compaction.py --retention 24       # ...and drop months older than 2 years
+#   python log_compaction.py --import tracker_log.jsonl   # split an existing log into months
+
+import argparse
+import datetime
+import gzip
+import json
+import os
+import threading
+
+from instrumentation import span
+from log_reader import iter_jsonl
+from log_store import PARTITION_DIR, PartitionedLogStore, _FileLock
+
+# === Policy
+RETENTION_MONTHS = int(os.environ.get("DIET_LOG_RETENTION_MONTHS", "0"))  # 0 keeps every month
+COMPACT_INTERVAL_S = float(os.environ.get("DIET_LOG_COMPACT_INTERVAL", "3600"))  # 0 disables the job
+
+
+def _shift_month(month, delta):
+    number = int(month[:4]) * 12 + int(month[5:7]) - 1 + delta
+    return f"{number // 12:04d}-{number % 12 + 1:02d}"
+
+
+def compact_partition(path, profiles):
+    """
+    Rewrite one month's .jsonl as .jsonl.gz, storing each distinct profile
+    snapshot once in a header. `profiles` (user -> latest profile) is
+    updated in place. Returns (entries, path of the new file) with the new
+    file still under a temporary name, for the caller to move into place.
+    """
+    # Pass 1: profile table and original line sizes, which the header must hold
+    table, ids, sizes = [], {}, []
+    pending = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # Partial line from an interrupted writer
+            pending += len(line)
+            if not line.strip():
+                continue
+            sizes.append(pending)
+            pending = 0
+            entry = json.loads(line)
+            profile = entry.get("profile")
+            if profile is not None:
+                key = tuple(profile.items())
+                if key not in ids:
+                    ids[key] = len(table)
+                    table.append(profile)
+                profiles[entry["user"]] = profile
+
+    # Pass 2: entries with profiles replaced by their table index
+    tmp_path = path + ".gz.tmp"
+    with open(path, "rb") as f, gzip.open(tmp_path, "wt", encoding="utf-8") as out:
+        out.write(json.dumps({"profiles": table, "sizes": sizes}, separators=(",", ":")) + "\n")
+        for line, _ in zip(filter(bytes.strip, f), sizes):
+            entry = json.loads(line)
+            if entry.get("profile") is not None:
+                entry["profile"] = ids[tuple(entry["profile"].items())]
+            out.write(json.dumps(entry, separators=(",", ":")) + "\n")
+    return len(sizes), tmp_path
+
+
+def _save_manifest(store, manifest):
+    tmp_path = store.manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, store.manifest_path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except PermissionError:
+        pass  # Still open by a reader on Windows; the .gz wins and the next run retries
+
+
+def compact(store, retention_months=RETENTION_MONTHS, today=None):
+    """
+    Compact every finished month (before both the current month and the
+    newest partition, so nothing is still appending to it), then drop
+    compacted months older than `retention_months` (0 keeps everything).
+    Latest profiles survive in the manifest. Returns {"compacted", "dropped"}.
+    """
+    current = (today or datetime.date.today()).strftime("%Y-%m")
+    compacted, dropped = [], []
+    with span("log.compact"), _FileLock(os.path.join(store.path, ".compact.lock")):
+        partitions = store.partitions()
+        newest = partitions[-1][0] if partitions else current
+        manifest = store.manifest()
+        manifest.setdefault("profiles", {})
+        manifest.setdefault("months", {})
+
+        for month, path, compressed in partitions:
+            if compressed:
+                _remove(store.hot_path(month))  # Left over from an interrupted run
+                continue
+            if month >= current or month >= newest:
+                break
+            size = os.path.getsize(path)
+            count, tmp_path = compact_partition(path, manifest["profiles"])
+            manifest["months"][month] = {"entries": count, "bytes": size,
+                                         "compressed_bytes": os.path.getsize(tmp_path)}
+            # Manifest first: until the .gz appears, profiles are still read from the .jsonl
+            _save_manifest(store, manifest)
+            os.replace(tmp_path, path + ".gz")
+            _remove(path)
+            compacted.append(month)
+
+        if retention_months > 0:
+            cutoff = _shift_month(current, -retention_months)
+            for month, path, compressed in store.partitions():
+                if month >= cutoff or month >= newest:
+                    break
+                if compressed:
+                    _remove(path)
+                    manifest["months"].pop(month, None)
+                    dropped.append(month)
+            if dropped:
+                _save_manifest(store, manifest)
+    return {"compacted": compacted, "dropped": dropped}
+
+
+class CompactionJob:
+    """
+    Daemon thread running compact() every `interval_s` seconds
+    """
+
+    def __init__(self, store, interval_s=COMPACT_INTERVAL_S, retention_months=RETENTION_MONTHS):
+        self.store = store
+        self.interval_s = interval_s
+        self.retention_months = retention_months
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="log-compaction", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while True:
+            try:
+                result = compact(self.store, self.retention_months)
+                if result["compacted"] or result["dropped"]:
+                    print(f"🗜️ Log compaction: compacted {result['compacted']}, dropped {result['dropped']}")
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Log compaction failed: {e}")
+            if self._stop.wait(self.interval_s):
+                return
+
+
+_job = None
+_job_lock = threading.Lock()
+
+
+def start_compaction_job(store):
+    """
+    Start the process-wide background compaction job (once; not if disabled)
+    """
+    global _job
+    with _job_lock:
+        if _job is None and COMPACT_INTERVAL_S > 0:
+            _job = CompactionJob(store).start()
+        return _job
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact the month-partitioned food log")
+    parser.add_argument("--dir", default=PARTITION_DIR, help="Partition directory")
+    parser.add_argument("--retention", type=int, default=RETENTION_MONTHS,
+                        help="Drop months older than this many months (0 keeps all)")
+    parser.add_argument("--import", dest="source", help="First split this JSON-lines log into months")
+    args = parser.parse_args()
+
+    store = PartitionedLogStore(args.dir)
+    if args.source:
+        imported = store.import_entries(iter_jsonl(args.source))
+        print(f"📦 Imported {imported} entries from {args.source}" if imported
+              else f"⚠️ {args.dir} already has data, nothing imported")
+
+    result = compact(store, args.retention)
+    months = store.manifest().get("months", {})
+    for month in result["compacted"]:
+        info = months[month]
+        print(f"🗜️ {month}: {info['entries']} entries, {info['bytes']:,} -> {info['compressed_bytes']:,} bytes")
+    for month in result["dropped"]:
+        print(f"🗑️ {month}: past retention, removed")
+    if not result["compacted"] and not result["dropped"]:
+        print("✅ Nothing to compact")
+
+
+if __name__ == "__main__":
+    main()
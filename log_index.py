@@ -0,0 +1,97 @@
+# log_index.py
+
+import threading
+from array import array
+from collections import defaultdict
+
+from compact_log import CompactLog
+from log_store import get_log_store
+
+
+class LogIndex:
+    """
+    In-memory secondary indexes over a log store:
+    (user, date) -> rows, and user -> latest profile.
+    Entries are held in a CompactLog and rebuilt as dicts only when queried.
+
+    The index remembers the store cursor it has read up to, so each refresh
+    only reads entries appended since the last call (by this or any other process).
+    Stores partitioned by time are only indexed from their live partition
+    on; older days and profiles are answered by the store itself.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.start, self.first_day = store.live_partition() if hasattr(store, "live_partition") else (0, "")
+        self.cursor = self.start
+        self.rows = CompactLog()
+        self.by_user_day = defaultdict(lambda: array("i"))
+        self.latest_profiles = {}
+        self._lock = threading.Lock()
+
+    def _add(self, entry):
+        try:
+            row = self.rows.append(entry)
+        except (KeyError, TypeError, ValueError):
+            # A malformed entry must not stop the index for everyone else
+            print(f"⚠️ Skipping malformed log entry in log index: {entry!r:.200}")
+            return
+        user = self.rows.users[self.rows.user[row]]  # Interned name
+        day = entry["timestamp"][:10]  # "YYYY-MM-DD HH:MM:SS"
+        self.by_user_day[(user, day)].append(row)
+        if "profile" in entry:
+            self.latest_profiles[user] = self.rows.profile_of(row)
+
+    def refresh(self):
+        """
+        Pull new entries from the store and fold them into the indexes
+        """
+        with self._lock:
+            added = 0
+            for entry, self.cursor in self.store.scan_since(self.cursor):
+                self._add(entry)
+                added += 1
+            return added
+
+    def entries_for_day(self, name, day):
+        self.refresh()
+        if day < self.first_day:
+            return self.store.entries_for_day(name, day)
+        return [self.rows[row] for row in self.by_user_day.get((name, day), ())]
+
+    def day_rows(self, name, day):
+        """
+        Row numbers into self.rows for one user's day, as a live array that
+        later refreshes append to (empty and detached if there are none yet)
+        """
+        self.refresh()
+        return self.by_user_day.get((name, day), array("i"))
+
+    @property
+    def loaded(self):
+        return self.cursor > self.start
+
+    def latest_profile(self, name):
+        self.refresh()
+        profile = self.latest_profiles.get(name)
+        if profile is None and self.start:
+            profile = self.store.latest_profile(name)  # Last seen before the live partition
+            if profile is not None:
+                with self._lock:
+                    self.latest_profiles.setdefault(name, profile)
+        return profile
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_log_index():
+    """
+    Return the process-wide index over the default log store
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = LogIndex(get_log_store())
+        return _index
@@ -0,0 +1,112 @@
+# log_reader.py
+
+import json
+import mmap
+
+CHUNK_SIZE = 1 << 16
+_decoder = json.JSONDecoder()
+
+
+def _line_matches(line, user_key, start, end):
+    """
+    Cheap byte-level prefilter run before json.loads. Relies on the layout
+    log_food_entry writes: timestamp first, then user, default separators.
+    """
+    if user_key is not None and user_key not in line:
+        return False
+    if (start is not None or end is not None) and line.startswith(b'{"timestamp": "'):
+        ts = line[15:34].decode("ascii", "replace")
+        if (start is not None and ts < start) or (end is not None and ts >= end):
+            return False
+    return True
+
+
+def _entry_matches(entry, user, start, end):
+    return ((user is None or entry["user"] == user)
+            and (start is None or entry["timestamp"] >= start)
+            and (end is None or entry["timestamp"] < end))
+
+
+def _user_key(user):
+    return None if user is None else b'"user": ' + json.dumps(user).encode("utf-8")
+
+
+def iter_jsonl(path, user=None, start=None, end=None):
+    """
+    Stream entries from a JSON-lines log, optionally only one user's and only
+    timestamps in [start, end). Lines that cannot match are skipped without
+    being parsed.
+    """
+    user_key = _user_key(user)
+    try:
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n") or not line.strip():
+                    continue
+                if not _line_matches(line, user_key, start, end):
+                    continue
+                entry = json.loads(line)
+                if _entry_matches(entry, user, start, end):
+                    yield entry
+    except FileNotFoundError:
+        return
+
+
+def iter_jsonl_reversed(path, user=None, start=None, end=None):
+    """
+    Stream entries newest-first by walking a memory-mapped JSON-lines log
+    backwards from the tail. Stop iterating as soon as you have what you need.
+    """
+    user_key = _user_key(user)
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        if f.seek(0, 2) == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end_pos = mm.rfind(b"\n") + 1  # Ignore a partial last line
+            while end_pos > 0:
+                start_pos = mm.rfind(b"\n", 0, end_pos - 1) + 1
+                line = mm[start_pos:end_pos]
+                end_pos = start_pos
+                if line.strip() and _line_matches(line, user_key, start, end):
+                    entry = json.loads(line)
+                    if _entry_matches(entry, user, start, end):
+                        yield entry
+
+
+def iter_json_array(path, user=None, start=None, end=None):
+    """
+    Stream entries from a legacy JSON array log ("[{...}, {...}]") without
+    loading the whole array: objects are decoded one at a time from a
+    sliding text buffer.
+    """
+    try:
+        f = open(path, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with f:
+        buffer, pos, eof = "", 0, False
+        while True:
+            # Skip separators between objects
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,[":
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            try:
+                entry, pos = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    if buffer[pos:].strip():
+                        raise
+                    return
+                chunk = f.read(CHUNK_SIZE)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            if _entry_matches(entry, user, start, end):
+                yield entry
+
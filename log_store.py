@@ -0,0 +1,472 @@
+# log_store.py
+
+import datetime
+import gzip
+import itertools
+import json
+import os
+import re
+import sqlite3
+import threading
+
+from log_reader import iter_json_array, iter_jsonl, iter_jsonl_reversed
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# === Log file locations
+LEGACY_LOG_FILE = "tracker_log.json"
+JSONL_LOG_FILE = "tracker_log.jsonl"
+SQLITE_LOG_FILE = "tracker_log.db"
+PARTITION_DIR = os.environ.get("DIET_LOG_DIR", "tracker_log")
+
+# === Backend selection ("jsonl", "sqlite" or "partitioned")
+LOG_BACKEND = os.environ.get("DIET_LOG_BACKEND", "jsonl")
+
+
+def _day_bounds(day):
+    """
+    Return [start, end) timestamp strings covering one ISO date
+    """
+    start = datetime.date.fromisoformat(day)
+    end = start + datetime.timedelta(days=1)
+    return start.isoformat(), end.isoformat()
+
+
+class _FileLock:
+    """
+    Exclusive inter-process lock held on a sidecar ".lock" file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+
+    def __enter__(self):
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(self.fd, msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self.fd, 0, os.SEEK_SET)
+            msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+        os.close(self.fd)
+        self.fd = None
+
+
+class LogStore:
+    """
+    Base class for food log backends.
+
+    Backends only have to implement append, import_entries and scan_since;
+    the query helpers fall back to a scan and can be overridden.
+    """
+
+    def append(self, entry):
+        raise NotImplementedError
+
+    def import_entries(self, entries):
+        """
+        Bulk-load an iterable of entries into an empty store. Returns the
+        number written, or 0 if the store already had data.
+        """
+        raise NotImplementedError
+
+    def scan_since(self, cursor=0):
+        """
+        Lazily yield (entry, cursor after that entry) for everything appended after cursor
+        """
+        raise NotImplementedError
+
+    def read_since(self, cursor=0):
+        """
+        Return (entries, new_cursor) for everything appended after cursor
+        """
+        entries = []
+        for entry, cursor in self.scan_since(cursor):
+            entries.append(entry)
+        return entries, cursor
+
+    def iter_entries(self):
+        for entry, _ in self.scan_since(0):
+            yield entry
+
+    def latest_profile(self, name):
+        profile = None
+        for entry in self.iter_entries():
+            if entry["user"] == name and "profile" in entry:
+                profile = entry["profile"]
+        return profile
+
+    def entries_for_day(self, name, day):
+        return [entry for entry in self.iter_entries()
+                if entry["user"] == name and entry["timestamp"].startswith(day)]
+
+
+class JsonLinesLogStore(LogStore):
+    """
+    One JSON object per line. Appends are a single O_APPEND write under a
+    file lock, followed by fsync, so concurrent writers never clobber each other.
+    """
+
+    def __init__(self, path=JSONL_LOG_FILE):
+        self.path = path
+        self.lock_path = path + ".lock"
+
+    def _write_lines(self, entries, batch_size=10000):
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        written = 0
+        try:
+            batch = []
+            for entry in entries:
+                batch.append(json.dumps(entry) + "\n")
+                if len(batch) >= batch_size:
+                    os.write(fd, "".join(batch).encode("utf-8"))
+                    written += len(batch)
+                    batch = []
+            if batch:
+                os.write(fd, "".join(batch).encode("utf-8"))
+                written += len(batch)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        return written
+
+    def append(self, entry):
+        with _FileLock(self.lock_path):
+            self._write_lines([entry])
+
+    def import_entries(self, entries):
+        with _FileLock(self.lock_path):
+            if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                return 0
+            return self._write_lines(entries)
+
+    def scan_since(self, cursor=0):
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            f.seek(cursor)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Partial line from a writer still in progress
+                cursor += len(line)
+                if line.strip():
+                    yield json.loads(line), cursor
+
+    def iter_entries(self):
+        return iter_jsonl(self.path)
+
+    def latest_profile(self, name):
+        # Walk back from the tail and stop at the first hit
+        for entry in iter_jsonl_reversed(self.path, user=name):
+            if "profile" in entry:
+                return entry["profile"]
+        return None
+
+    def entries_for_day(self, name, day):
+        start, end = _day_bounds(day)
+        return list(iter_jsonl(self.path, user=name, start=start, end=end))
+
+
+class SQLiteLogStore(LogStore):
+    """
+    SQLite in WAL mode. Readers never block the writer and
+    lookups by user / day go through an index instead of a scan.
+    """
+
+    def __init__(self, path=SQLITE_LOG_FILE):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                user TEXT NOT NULL,
+                has_profile INTEGER NOT NULL,
+                data TEXT NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_user_time ON entries (user, timestamp)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_user_profile ON entries (user, has_profile, id)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(entry):
+        return (entry["timestamp"], entry["user"], int("profile" in entry), json.dumps(entry))
+
+    def append(self, entry):
+        self._conn().execute(
+            "INSERT INTO entries (timestamp, user, has_profile, data) VALUES (?, ?, ?, ?)",
+            self._row(entry))
+
+    def import_entries(self, entries):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM entries LIMIT 1").fetchone():
+                conn.execute("ROLLBACK")
+                return 0
+            cursor = conn.executemany(
+                "INSERT INTO entries (timestamp, user, has_profile, data) VALUES (?, ?, ?, ?)",
+                (self._row(entry) for entry in entries))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount
+
+    def scan_since(self, cursor=0):
+        rows = self._conn().execute(
+            "SELECT id, data FROM entries WHERE id > ? ORDER BY id", (cursor,))
+        for row_id, data in rows:
+            yield json.loads(data), row_id
+
+    def iter_entries(self):
+        for (data,) in self._conn().execute("SELECT data FROM entries ORDER BY id"):
+            yield json.loads(data)
+
+    def latest_profile(self, name):
+        row = self._conn().execute(
+            "SELECT data FROM entries WHERE user = ? AND has_profile = 1 "
+            "ORDER BY id DESC LIMIT 1", (name,)).fetchone()
+        return json.loads(row[0])["profile"] if row else None
+
+    def entries_for_day(self, name, day):
+        start, end = _day_bounds(day)
+        rows = self._conn().execute(
+            "SELECT data FROM entries WHERE user = ? AND timestamp >= ? AND timestamp < ? "
+            "ORDER BY id", (name, start, end)).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+
+# === Month partitions: "YYYY-MM.jsonl" (hot) or "YYYY-MM.jsonl.gz" (compacted)
+_PARTITION_NAME = re.compile(r"^(\d{4}-\d{2})\.jsonl(\.gz)?$")
+_OFFSET_BITS = 40  # Cursor = (month number << 40) + byte offset within the month
+
+
+def _month_number(month):
+    return int(month[:4]) * 12 + int(month[5:7]) - 1
+
+
+def read_cold_partition(path):
+    """
+    Yield (entry, end offset in the original .jsonl) from a compacted
+    partition: a header line {"profiles": [...], "sizes": [...]} and then
+    one entry per line, whose "profile" is an index into the header's table
+    """
+    try:
+        f = gzip.open(path, "rt", encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with f:
+        header = json.loads(f.readline())
+        profiles = header["profiles"]
+        offset = 0
+        for line, size in zip(f, header["sizes"]):
+            entry = json.loads(line)
+            if "profile" in entry:
+                entry["profile"] = dict(profiles[entry["profile"]])
+            offset += size
+            yield entry, offset
+
+
+class PartitionedLogStore(LogStore):
+    """
+    JSON-lines log split into one file per calendar month under a directory.
+
+    Appends go to the newest month, a plain .jsonl file like
+    JsonLinesLogStore's, so today's entries and recent profiles are read
+    from that one file and every cursor reader sees each new entry. A
+    backdated entry is filed there too; entries_for_day also looks in later
+    months, so it is still found under its own day. Finished months are
+    compacted to gzip with shared profile snapshots, and dropped after the
+    retention period, by
+    log_compaction.py. Cursors encode the month and the byte offset in its
+    uncompressed file, so they stay valid when a month is compacted.
+    """
+
+    def __init__(self, path=PARTITION_DIR):
+        self.path = path
+        self.lock_path = os.path.join(path, ".lock")
+        self.manifest_path = os.path.join(path, "manifest.json")
+        os.makedirs(path, exist_ok=True)
+
+    def partitions(self):
+        """
+        Return [(month, path, compressed)] sorted by month. A month is read
+        from its .gz once that exists, even if the .jsonl is still around.
+        """
+        found = {}
+        for name in os.listdir(self.path):
+            match = _PARTITION_NAME.match(name)
+            if match and (match.group(2) or match.group(1) not in found):
+                found[match.group(1)] = (os.path.join(self.path, name), bool(match.group(2)))
+        return [(month, path, compressed) for month, (path, compressed) in sorted(found.items())]
+
+    def hot_path(self, month):
+        return os.path.join(self.path, f"{month}.jsonl")
+
+    def manifest(self):
+        """
+        Compaction bookkeeping, including "profiles": the latest profile of
+        every user as of the compacted (and possibly deleted) months
+        """
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def live_partition(self):
+        """
+        (cursor, first day) of the newest month, for readers that only need
+        live data; older entries stay reachable through the query methods
+        """
+        partitions = self.partitions()
+        if not partitions:
+            return 0, ""
+        month = partitions[-1][0]
+        return _month_number(month) << _OFFSET_BITS, month + "-01"
+
+    def _write(self, entries):
+        # Never write behind the newest month: cursors are (month, offset),
+        # so an entry filed in an older month would sit behind every cursor
+        # already handed out. Backdated entries are matched to their own
+        # day at read time instead (see entries_for_day).
+        partitions = self.partitions()
+        newest = [partitions[-1][0] if partitions else ""]
+
+        def month_of(entry):
+            newest[0] = max(newest[0], entry["timestamp"][:7])
+            return newest[0]
+
+        written = 0
+        for month, group in itertools.groupby(entries, key=month_of):
+            written += JsonLinesLogStore(self.hot_path(month))._write_lines(group)
+        return written
+
+    def append(self, entry):
+        with _FileLock(self.lock_path):
+            self._write([entry])
+
+    def import_entries(self, entries):
+        with _FileLock(self.lock_path):
+            if self.partitions():
+                return 0
+            return self._write(entries)
+
+    def scan_since(self, cursor=0):
+        start_month, offset = divmod(cursor, 1 << _OFFSET_BITS)
+        for month, path, compressed in self.partitions():
+            number = _month_number(month)
+            if number < start_month:
+                continue
+            if number > start_month:
+                offset = 0
+            base = number << _OFFSET_BITS
+            if not compressed:
+                found = False
+                for entry, end in JsonLinesLogStore(path).scan_since(offset):
+                    found = True
+                    yield entry, base + end
+                if found or os.path.exists(path):
+                    continue
+                path += ".gz"  # Compacted since it was listed
+            for entry, end in read_cold_partition(path):
+                if end > offset:
+                    yield entry, base + end
+
+    def latest_profile(self, name):
+        for month, path, compressed in reversed(self.partitions()):
+            if compressed:
+                continue  # Summarized in the manifest
+            for entry in iter_jsonl_reversed(path, user=name):
+                if "profile" in entry:
+                    return entry["profile"]
+        return self.manifest().get("profiles", {}).get(name)
+
+    def entries_for_day(self, name, day):
+        start, end = _day_bounds(day)
+        entries = []
+        for month, path, compressed in self.partitions():
+            if month < day[:7]:
+                continue  # Later months can still hold late entries for the day
+            if compressed:
+                entries.extend(entry for entry, _ in read_cold_partition(path)
+                               if entry["user"] == name and start <= entry["timestamp"] < end)
+            else:
+                entries.extend(iter_jsonl(path, user=name, start=start, end=end))
+        return entries
+
+
+# === Registered backends
+BACKENDS = {
+    "jsonl": JsonLinesLogStore,
+    "sqlite": SQLiteLogStore,
+    "partitioned": PartitionedLogStore,
+}
+
+
+def migrate_legacy_log(store, legacy_path=LEGACY_LOG_FILE, reader=iter_json_array):
+    """
+    One-time import of an older log file into a store (by default the old
+    single JSON array log). The file is renamed once its entries are in,
+    so it is never imported twice; if nothing was imported (the store
+    already had data) it is left where it is, with a warning.
+    """
+    if not os.path.exists(legacy_path):
+        return 0
+
+    imported = store.import_entries(reader(legacy_path))
+    if not imported:
+        print(f"⚠️ {legacy_path} was not migrated: the log store already has data or the file is empty")
+        return 0
+    try:
+        os.replace(legacy_path, legacy_path + ".migrated")
+    except FileNotFoundError:
+        pass  # Another process finished the migration first
+    print(f"📦 Migrated {imported} entries from {legacy_path}")
+    return imported
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_log_store():
+    """
+    Return the process-wide log store, migrating the legacy log on first use
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            store = BACKENDS[LOG_BACKEND]()
+            if isinstance(store, PartitionedLogStore):
+                migrate_legacy_log(store, JSONL_LOG_FILE, reader=iter_jsonl)
+            migrate_legacy_log(store)
+            if isinstance(store, PartitionedLogStore):
+                from log_compaction import start_compaction_job
+                start_compaction_job(store)
+            _store = store
+        return _store
@@ -0,0 +1,68 @@
+# model_registry.py
+
+import threading
+
+# === Default detector weights
+DEFAULT_WEIGHTS = "yolov8n.pt"
+
+_models = {}
+_backends = {}
+_lock = threading.RLock()
+
+
+def get_model(weights=DEFAULT_WEIGHTS):
+    """
+    Return the shared YOLO model for the given weights, loading it on first use.
+    Every module goes through here, so there is one instance per process.
+    """
+    model = _models.get(weights)
+    if model is None:
+        with _lock:
+            model = _models.get(weights)
+            if model is None:
+                # Deferred: importing ultralytics pulls in torch, which takes seconds
+                from ultralytics import YOLO
+                model = YOLO(weights)
+                _models[weights] = model
+    return model
+
+
+def get_backend(name=None, weights=DEFAULT_WEIGHTS, threads=None):
+    """
+    Return the shared detector backend (see detector_backend). Defaults come
+    from DIET_DETECTOR_BACKEND and DIET_DETECTOR_THREADS.
+    """
+    from detector_backend import DETECTOR_BACKEND, DETECTOR_THREADS, create_backend
+    name = name or DETECTOR_BACKEND
+    threads = DETECTOR_THREADS if threads is None else threads
+    key = (name, weights)
+    backend = _backends.get(key)
+    if backend is None:
+        with _lock:
+            backend = _backends.get(key)
+            if backend is None:
+                backend = _backends[key] = create_backend(name, weights, threads)
+    return backend
+
+
+def backend_id(name=None, weights=DEFAULT_WEIGHTS):
+    """
+    Identifier of the configured backend, available without loading it
+    """
+    from detector_backend import DETECTOR_BACKEND
+    return f"{name or DETECTOR_BACKEND}:{weights}"
+
+
+def warm_up_async(weights=DEFAULT_WEIGHTS, on_ready=None):
+    """
+    Load the detector backend in a background thread so the first detection is fast.
+    on_ready(backend) is called from that thread once loading finishes.
+    """
+    def _warm():
+        backend = get_backend(weights=weights)
+        if on_ready is not None:
+            on_ready(backend)
+
+    thread = threading.Thread(target=_warm, name="model-warmup", daemon=True)
+    thread.start()
+    return thread
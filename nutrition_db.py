@@ -0,0 +1,260 @@
+# nutrition_db.py
+
+import csv
+import difflib
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+from collections.abc import Set
+
+# === Data locations (override with DIET_NUTRITION_DATA / DIET_NUTRITION_DB)
+NUTRITION_DATA_FILE = os.environ.get(
+    "DIET_NUTRITION_DATA", os.path.join(os.path.dirname(os.path.abspath(__file__)), "nutrition_data.csv"))
+NUTRITION_DB_FILE = os.environ.get("DIET_NUTRITION_DB", "nutrition.db")
+
+# Per portion: kcal, grams of protein / carbs / fat, portion description and its weight in grams
+Food = namedtuple("Food", "id name calories protein carbs fat portion grams")
+
+_COLUMNS = "f.id, f.name, f.calories, f.protein, f.carbs, f.fat, f.portion, f.grams"
+_BATCH = 500  # Stay well under SQLite's bound-parameter limit
+
+
+def normalize(text):
+    """
+    Canonical lookup key: lowercase, '_' / '-' as spaces, single spaces
+    """
+    return " ".join(text.lower().replace("_", " ").replace("-", " ").split())
+
+
+def _number(value):
+    return int(value) if float(value).is_integer() else float(value)
+
+
+class NutritionDB:
+    """
+    Nutrition facts for foods, built from a CSV data file into an indexed
+    SQLite store.
+
+    Every food name and alias is stored once as a normalized key in a
+    WITHOUT ROWID table, so exact and alias lookups are a single index
+    probe and prefix search is an index range scan. Nothing is read until
+    the first lookup; the store is rebuilt only when the data file changes,
+    and looked-up foods are cached in memory.
+    """
+
+    def __init__(self, data_path=NUTRITION_DATA_FILE, path=NUTRITION_DB_FILE):
+        self.data_path = data_path
+        self.path = path
+        self._local = threading.local()
+        self._cache = {}   # normalized key -> Food or None
+        self._ready = False
+        self._build_lock = threading.Lock()
+
+    # === Store
+    def _source_stamp(self):
+        try:
+            stat = os.stat(self.data_path)
+        except FileNotFoundError:
+            return None
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def _is_current(self, stamp):
+        if not os.path.exists(self.path):
+            return False
+        if stamp is None:  # No data file, use the store as shipped
+            return True
+        try:
+            conn = sqlite3.connect(self.path)
+            try:
+                row = conn.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+            finally:
+                conn.close()
+        except sqlite3.DatabaseError:
+            return False
+        return row is not None and row[0] == stamp
+
+    def _ensure_built(self):
+        if self._ready:
+            return
+        with self._build_lock:
+            if self._ready:
+                return
+            stamp = self._source_stamp()
+            if not self._is_current(stamp):
+                if stamp is None:
+                    raise FileNotFoundError(f"Nutrition data file not found: {self.data_path}")
+                self.build(stamp)
+            self._ready = True
+
+    def build(self, stamp=None):
+        """
+        (Re)build the store from the data file. The new store is written to
+        a temporary file and swapped in, so concurrent readers never see a
+        half-built table. Returns the number of foods.
+        """
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.executescript("""
+                DROP TABLE IF EXISTS foods;
+                DROP TABLE IF EXISTS names;
+                DROP TABLE IF EXISTS meta;
+                CREATE TABLE foods (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    calories REAL NOT NULL,
+                    protein REAL, carbs REAL, fat REAL,
+                    portion TEXT, grams REAL
+                );
+                CREATE TABLE names (key TEXT PRIMARY KEY, food_id INTEGER NOT NULL) WITHOUT ROWID;
+                CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            """)
+            count = 0
+            with open(self.data_path, newline="", encoding="utf-8") as f:
+                for food_id, row in enumerate(csv.DictReader(f)):
+                    name = normalize(row["name"])
+                    conn.execute("INSERT INTO foods VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (
+                        food_id, name, float(row["calories"]),
+                        _optional(row.get("protein")), _optional(row.get("carbs")), _optional(row.get("fat")),
+                        row.get("portion") or None, _optional(row.get("grams")),
+                    ))
+                    # A canonical name always wins over another food's alias
+                    conn.execute("INSERT OR REPLACE INTO names VALUES (?, ?)", (name, food_id))
+                    for alias in (row.get("aliases") or "").split("|"):
+                        if normalize(alias):
+                            conn.execute("INSERT OR IGNORE INTO names VALUES (?, ?)", (normalize(alias), food_id))
+                    count += 1
+            conn.execute("INSERT INTO meta VALUES ('source', ?)", (stamp or self._source_stamp() or "",))
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_path, self.path)
+        self._close()
+        self._cache.clear()
+        return count
+
+    def _conn(self):
+        self._ensure_built()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def _close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # === Lookups
+    def lookup(self, name):
+        """
+        Exact or alias match -> Food, or None
+        """
+        return self.lookup_many([name])[0]
+
+    def lookup_many(self, names):
+        """
+        Batch exact/alias lookup for e.g. a frame's detected labels.
+        Returns a list aligned with names (None where unknown).
+        """
+        keys = [normalize(name) for name in names]
+        missing = list({key for key in keys if key not in self._cache})
+        if missing:
+            conn = self._conn()
+            found = {}
+            for i in range(0, len(missing), _BATCH):
+                chunk = missing[i:i + _BATCH]
+                rows = conn.execute(
+                    f"SELECT n.key, {_COLUMNS} FROM names n JOIN foods f ON f.id = n.food_id "
+                    f"WHERE n.key IN ({','.join('?' * len(chunk))})", chunk).fetchall()
+                for row in rows:
+                    found[row[0]] = _food(row[1:])
+            for key in missing:
+                self._cache[key] = found.get(key)
+        return [self._cache[key] for key in keys]
+
+    def search(self, text, limit=10):
+        """
+        Fuzzy-prefix search for free-text input: foods with a name or alias
+        starting with text (shortest first), else close spellings.
+        """
+        key = normalize(text)
+        if not key:
+            return []
+        conn = self._conn()
+        rows = conn.execute(
+            f"SELECT {_COLUMNS} FROM names n JOIN foods f ON f.id = n.food_id "
+            "WHERE n.key >= ? AND n.key < ? ORDER BY length(n.key), n.key",
+            (key, key + "\uffff")).fetchall()
+        if not rows:
+            # Typo fallback: compare against keys sharing the first letter
+            candidates = [row[0] for row in conn.execute(
+                "SELECT key FROM names WHERE key >= ? AND key < ?", (key[0], key[0] + "\uffff"))]
+            close = difflib.get_close_matches(key, candidates, n=limit, cutoff=0.7)
+            rows = [row for match in close for row in conn.execute(
+                f"SELECT {_COLUMNS} FROM names n JOIN foods f ON f.id = n.food_id WHERE n.key = ?", (match,))]
+
+        results, seen = [], set()
+        for row in rows:
+            if row[0] not in seen:
+                seen.add(row[0])
+                results.append(_food(row))
+                if len(results) == limit:
+                    break
+        return results
+
+    def names(self):
+        """
+        Canonical food names in data file order
+        """
+        return [row[0] for row in self._conn().execute("SELECT name FROM foods ORDER BY id")]
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM foods").fetchone()[0]
+
+    def __contains__(self, name):
+        return self.lookup(name) is not None
+
+
+def _optional(value):
+    return float(value) if value not in (None, "") else None
+
+
+def _food(row):
+    food_id, name, calories, protein, carbs, fat, portion, grams = row
+    return Food(food_id, name, _number(calories), protein, carbs, fat, portion, grams)
+
+
+class FoodNames(Set):
+    """
+    Set-like view of the food names in the nutrition database (aliases
+    included for membership). Opening the database is deferred until the
+    view is first used, and membership tests never load the whole table.
+    """
+
+    def __contains__(self, name):
+        return isinstance(name, str) and get_nutrition_db().lookup(name) is not None
+
+    def __iter__(self):
+        return iter(get_nutrition_db().names())
+
+    def __len__(self):
+        return len(get_nutrition_db())
+
+
+_db = None
+_db_lock = threading.Lock()
+
+
+def get_nutrition_db():
+    """
+    Return the process-wide nutrition database
+    """
+    global _db
+    with _db_lock:
+        if _db is None:
+            _db = NutritionDB()
+        return _db
@@ -0,0 +1,135 @@
+# portion.py
+
+import math
+
+import numpy as np
+
+from nutrition_db import get_nutrition_db
+
+# === Reference objects: typical longest side in cm, most reliable first
+REFERENCE_SIZES_CM = {
+    "bowl": 16.0,
+    "cup": 9.0,
+    "fork": 19.0,
+    "diningtable": 120.0,  # Often cropped by the frame, so only a last resort
+}
+
+# === Bounding-box area (cm^2) of one nutrition DB portion of each COCO food
+TYPICAL_AREA_CM2 = {
+    "pizza": 180.0,      # 1 slice
+    "hot dog": 108.0,    # in a bun
+    "donut": 81.0,
+    "cake": 80.0,        # 1 slice
+    "sandwich": 144.0,
+    "apple": 64.0,
+    "banana": 126.0,
+    "orange": 56.0,
+    "carrot": 51.0,
+    "broccoli": 120.0,   # 1 cup chopped
+}
+
+MIN_PORTION = 0.25
+MAX_PORTION = 4.0
+
+
+def _reference_key(label):
+    # COCO says "dining table", some exports "diningtable"
+    return label.lower().replace(" ", "")
+
+
+def typical_area(food):
+    """
+    Box area of one portion of a nutrition DB Food. Foods without a measured
+    area are treated as a sphere of water-like density weighing `grams`.
+    """
+    if food.name in TYPICAL_AREA_CM2:
+        return TYPICAL_AREA_CM2[food.name]
+    if not food.grams:
+        return math.nan
+    radius = (3 * food.grams / (4 * math.pi)) ** (1 / 3)
+    return (2 * radius) ** 2
+
+
+class PortionEstimator:
+    """
+    Scales each food's calories by how big it looks next to a reference
+    object of known size (bowl, cup, fork or dining table).
+
+    The longest side of the best reference box in a frame gives pixels per
+    cm; each food box's area in cm^2 over the area of one standard portion
+    is its portion multiplier. Everything is computed with per-class lookup
+    arrays, so a whole frame costs a handful of numpy operations. Without a
+    reference in view every portion is 1.0, i.e. the fixed per-item calories.
+    """
+
+    def __init__(self, class_names, min_reference_score=0.3):
+        """
+        class_names can be a list or a YOLO-style {id: name} dict
+        """
+        labels = [class_names[i].lower() for i in range(len(class_names))]
+        sizes = {_reference_key(name): size for name, size in REFERENCE_SIZES_CM.items()}
+        rank = {name: i for i, name in enumerate(sizes)}
+        keys = [_reference_key(label) for label in labels]
+        self.min_reference_score = min_reference_score
+        self.reference_cm = np.array([sizes.get(key, np.nan) for key in keys], dtype=np.float32)
+        self.reference_rank = np.array([rank.get(key, len(rank)) for key in keys], dtype=np.int16)
+        foods = get_nutrition_db().lookup_many(labels)
+        self.food_area = np.array([np.nan if food is None else typical_area(food) for food in foods],
+                                  dtype=np.float32)
+        self.class_ids = {label: i for i, label in enumerate(labels)}
+
+    def pixels_per_cm(self, data):
+        """
+        Scale from the best reference object among (N, 6) raw detections
+        (x1, y1, x2, y2, score, class_id), or NaN if there is none
+        """
+        data = np.asarray(data, dtype=np.float32).reshape(-1, 6)
+        class_ids = data[:, 5].astype(np.intp)
+        size_cm = self.reference_cm[class_ids]
+        usable = ~np.isnan(size_cm) & (data[:, 4] >= self.min_reference_score)
+        if not usable.any():
+            return math.nan
+        rows = np.flatnonzero(usable)
+        # Most preferred class first, then the most confident box of it
+        best = rows[np.lexsort((-data[rows, 4], self.reference_rank[class_ids[rows]]))[0]]
+        side = max(data[best, 2] - data[best, 0], data[best, 3] - data[best, 1])
+        return float(side / size_cm[best])
+
+    def portions(self, boxes, pixels_per_cm):
+        """
+        Portion multiplier for each (N, 6) food box; 1.0 when the scale is
+        unknown or the food has no typical size
+        """
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 6)
+        if math.isnan(pixels_per_cm) or pixels_per_cm <= 0:
+            return np.ones(len(boxes), dtype=np.float32)
+        area_cm2 = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]) / pixels_per_cm ** 2
+        typical = self.food_area[boxes[:, 5].astype(np.intp)]
+        portions = np.clip(area_cm2 / typical, MIN_PORTION, MAX_PORTION)
+        return np.where(np.isnan(portions), 1.0, portions).astype(np.float32)
+
+    def from_labels(self, labels, boxes, scores):
+        """
+        Rebuild (N, 6) raw detections from label / box / score lists, as
+        stored in the detection cache
+        """
+        data = np.empty((len(labels), 6), dtype=np.float32)
+        data[:, :4] = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        data[:, 4] = scores
+        data[:, 5] = [self.class_ids[label] for label in labels]
+        return data
+
+
+def meal_calories(foods, portions=None):
+    """
+    Calories for a list of foods, each scaled by its portion multiplier.
+    Raises KeyError for a food the nutrition DB does not know.
+    """
+    found = get_nutrition_db().lookup_many(foods)
+    for name, food in zip(foods, found):
+        if food is None:
+            raise KeyError(name)
+    calories = [food.calories for food in found]
+    if portions is None:
+        return sum(calories)
+    return int(round(float(np.dot(calories, portions))))
@@ -0,0 +1,78 @@
+# postprocess.py
+
+import threading
+
+import numpy as np
+from numpy.lib import recfunctions
+
+from nutrition_db import get_nutrition_db
+
+# === Compact per-detection record
+DETECTION_DTYPE = np.dtype([
+    ("x1", np.float32), ("y1", np.float32), ("x2", np.float32), ("y2", np.float32),
+    ("score", np.float32),
+    ("class_id", np.int16),   # model class id
+    ("food_id", np.int16),    # index into FOOD_NAMES
+])
+
+# === Food ids number the foods some model class resolved to in the nutrition DB
+FOOD_NAMES = np.empty(0, dtype=object)
+_food_ids = {}
+_food_lock = threading.Lock()
+
+
+def build_food_lookup(class_names):
+    """
+    Map model class id -> food id (-1 for non-food classes), resolving all
+    class names against the nutrition DB in one batch lookup.
+    class_names can be a list or a YOLO-style {id: name} dict.
+    """
+    global FOOD_NAMES
+    foods = get_nutrition_db().lookup_many([class_names[i] for i in range(len(class_names))])
+    with _food_lock:
+        new = [food for food in foods if food is not None and food.name not in _food_ids]
+        for food in new:
+            _food_ids.setdefault(food.name, len(_food_ids))
+        if new:
+            FOOD_NAMES = np.array(sorted(_food_ids, key=_food_ids.get), dtype=object)
+        return np.array([-1 if food is None else _food_ids[food.name] for food in foods], dtype=np.int16)
+
+
+def to_numpy(data):
+    """
+    Raw YOLO boxes (tensor or array of x1, y1, x2, y2, score, class_id) -> (N, 6) float32
+    """
+    if hasattr(data, "cpu"):
+        data = data.cpu().numpy()
+    return np.asarray(data, dtype=np.float32).reshape(-1, 6)
+
+
+def filter_food(data, lookup, conf_threshold=0.0):
+    """
+    Keep confident food detections, using masks instead of a per-box loop.
+    Returns a structured array of DETECTION_DTYPE.
+    """
+    data = to_numpy(data)
+    class_ids = data[:, 5].astype(np.intp)
+    food_ids = lookup[class_ids]
+    keep = (data[:, 4] >= conf_threshold) & (food_ids >= 0)
+
+    kept = data[keep]
+    detections = np.empty(len(kept), dtype=DETECTION_DTYPE)
+    for i, field in enumerate(("x1", "y1", "x2", "y2", "score")):
+        detections[field] = kept[:, i]
+    detections["class_id"] = class_ids[keep]
+    detections["food_id"] = food_ids[keep]
+    return detections
+
+
+def food_labels(detections):
+    return FOOD_NAMES[detections["food_id"]].tolist()
+
+
+def as_boxes(detections):
+    """
+    Structured detections -> (N, 6) float32 rows of x1, y1, x2, y2, score, class_id
+    """
+    fields = ["x1", "y1", "x2", "y2", "score", "class_id"]
+    return recfunctions.structured_to_unstructured(detections[fields], dtype=np.float32)
@@ -0,0 +1,294 @@
+# roi.py
+#
+# Adaptive preprocessing for the detector: run YOLO on the part of the frame
+# that holds the meal, at an input size that fits a latency budget.
+#
+#   DIET_DETECT_ROI=objects python ui_main.py       # crop to bowl / dining table
+#   DIET_DETECT_ROI=saliency ...                    # crop to the most distinct region
+#   DIET_LATENCY_BUDGET_MS=80 ...                   # shrink YOLO's input to stay within 80 ms
+
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from postprocess import build_food_lookup
+
+# === Configuration
+DETECT_ROI = os.environ.get("DIET_DETECT_ROI", "")  # "", "objects" or "saliency"
+LATENCY_BUDGET_MS = float(os.environ.get("DIET_LATENCY_BUDGET_MS", "0"))  # 0 = fixed input size
+
+# YOLO input sizes to choose from (multiples of the 32 px stride)
+IMAGE_SIZES = (256, 320, 384, 448, 512, 576, 640)
+STRIDE = 32
+
+
+def _round_up(value, step=STRIDE):
+    return -(-int(value) // step) * step
+
+
+def crop(frame, box):
+    """
+    The (x1, y1, x2, y2) region of a frame, as a view sharing its memory
+    """
+    x1, y1, x2, y2 = box
+    return frame[y1:y2, x1:x2]
+
+
+def salient_region(frame, size=(64, 48), margin=0.1):
+    """
+    Bounding box of the region that stands out from the frame's average
+    colour (frequency-tuned saliency on a small Lab thumbnail), or None.
+    Costs well under a millisecond.
+    """
+    thumb = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    lab = cv2.cvtColor(thumb, cv2.COLOR_BGR2LAB).astype(np.float32)
+    blurred = cv2.GaussianBlur(lab, (5, 5), 0)
+    saliency = np.linalg.norm(blurred - lab.reshape(-1, 3).mean(axis=0), axis=2)
+    ys, xs = np.nonzero(saliency > 2 * saliency.mean())
+    if len(xs) < 4:
+        return None
+    # Percentiles rather than min / max, so specks do not stretch the box
+    box = np.array([np.percentile(xs, 2), np.percentile(ys, 2),
+                    np.percentile(xs, 98) + 1, np.percentile(ys, 98) + 1])
+    h, w = frame.shape[:2]
+    scale_x, scale_y = w / size[0], h / size[1]
+    return _expand(box * [scale_x, scale_y, scale_x, scale_y], (h, w), margin)
+
+
+def _expand(box, shape, margin):
+    """
+    Grow an (x1, y1, x2, y2) box by `margin` of its size on every side and
+    clip it to the frame; returns ints
+    """
+    h, w = shape[:2]
+    x1, y1, x2, y2 = box
+    pad_x, pad_y = (x2 - x1) * margin, (y2 - y1) * margin
+    return (max(0, int(x1 - pad_x)), max(0, int(y1 - pad_y)),
+            min(w, int(np.ceil(x2 + pad_x))), min(h, int(np.ceil(y2 + pad_y))))
+
+
+class RoiFinder:
+    """
+    Finds the meal region of a frame from a full-frame detection pass: the
+    union of bowls and food, else the dining table, else by saliency.
+    Regions covering most of the frame are not worth cropping (None).
+    """
+
+    def __init__(self, class_names, margin=0.15, min_score=0.3, max_fraction=0.8):
+        labels = [class_names[i].lower().replace(" ", "") for i in range(len(class_names))]
+        self.meal = (build_food_lookup(class_names) >= 0) | np.array([label == "bowl" for label in labels])
+        self.table = np.array([label == "diningtable" for label in labels])
+        self.margin = margin
+        self.min_score = min_score
+        self.max_fraction = max_fraction
+
+    def from_detections(self, data, shape):
+        data = np.asarray(data, dtype=np.float32).reshape(-1, 6)
+        data = data[data[:, 4] >= self.min_score]
+        class_ids = data[:, 5].astype(np.intp)
+        for mask in (self.meal[class_ids], self.table[class_ids]):
+            if mask.any():
+                boxes = data[mask, :4]
+                union = (*boxes[:, :2].min(axis=0), *boxes[:, 2:].max(axis=0))
+                return _expand(union, shape, self.margin)
+        return None
+
+    def find(self, frame, data=None):
+        box = self.from_detections(data, frame.shape) if data is not None else None
+        if box is None:
+            box = salient_region(frame)
+        if box is None:
+            return None
+        x1, y1, x2, y2 = box
+        if (x2 - x1) * (y2 - y1) >= self.max_fraction * frame.shape[0] * frame.shape[1]:
+            return None
+        return box
+
+
+class ImageSizeController:
+    """
+    Picks YOLO's input size from a latency budget. Keeps a smoothed latency
+    per size; steps below any size that runs over budget, and up when the
+    next size (measured, or extrapolated by pixel count) fits with 10% to
+    spare. Runs at a smaller size than chosen (small crops) only count
+    when they are over budget.
+    """
+
+    def __init__(self, budget_ms, sizes=IMAGE_SIZES, smoothing=0.3):
+        self.budget_ms = budget_ms
+        self.sizes = sizes
+        self.smoothing = smoothing
+        self.latency = {}
+        self.index = len(sizes) - 1  # Start at full size
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return self.sizes[self.index]
+
+    def record(self, size, ms):
+        with self._lock:
+            old = self.latency.get(size)
+            estimate = self.latency[size] = ms if old is None else old + self.smoothing * (ms - old)
+            if estimate > self.budget_ms:
+                smaller = [i for i, candidate in enumerate(self.sizes) if candidate < size]
+                if smaller:
+                    self.index = min(self.index, smaller[-1])
+            elif size == self.size and self.index < len(self.sizes) - 1:
+                bigger = self.sizes[self.index + 1]
+                predicted = self.latency.get(bigger, estimate * (bigger / size) ** 2)
+                if predicted < 0.9 * self.budget_ms:
+                    self.index += 1
+
+
+class AdaptiveBackend:
+    """
+    Wraps a detector backend (same predict / names / model_id interface)
+    to run on the meal region only, at an input size chosen from a latency
+    budget.
+
+    With roi="objects" the region comes from a full-frame pass, whose
+    detections are returned as they are; with roi="saliency" it is found
+    without running the model. Either way it is reused for `refresh_every`
+    frames, or until a crop comes back without food. Crops are views into
+    the frame, and detections are shifted back to full-frame coordinates.
+    The input size never exceeds the crop's own size, so small crops are
+    not upscaled. Meant for one stream of frames from the same view: give
+    each stream its own instance, and use detect_still() for unrelated photos.
+    """
+
+    def __init__(self, backend, roi=DETECT_ROI, latency_budget_ms=LATENCY_BUDGET_MS, refresh_every=60,
+                 max_size=IMAGE_SIZES[-1]):
+        self.backend = backend
+        self.names = backend.names
+        self.model_id = backend.model_id
+        self.roi = roi
+        finder, self.food = _roi_tables(backend)
+        self.finder = finder if roi else None
+        self.sizes = ImageSizeController(latency_budget_ms) if latency_budget_ms else None
+        self.refresh_every = refresh_every
+        self.max_size = max_size
+        self.region = None
+        self.since_refresh = refresh_every  # Find the region on the first frame
+
+    def _run(self, image, conf_threshold):
+        size = self.sizes.size if self.sizes is not None else self.max_size
+        size = min(size, _round_up(max(image.shape[:2])))
+        start = time.perf_counter()
+        data = self.backend.predict([image], conf_threshold, imgsz=size)[0]
+        if self.sizes is not None:
+            self.sizes.record(size, (time.perf_counter() - start) * 1000)
+        return data
+
+    def _predict_one(self, frame, conf_threshold):
+        if self.finder is not None and self.since_refresh >= self.refresh_every:
+            self.since_refresh = 0
+            if self.roi == "objects":
+                data = self._run(frame, conf_threshold)
+                self.region = self.finder.find(frame, data)
+                return data
+            self.region = self.finder.find(frame)
+        self.since_refresh += 1
+
+        if self.region is None:
+            return self._run(frame, conf_threshold)
+        x1, y1 = self.region[:2]
+        data = np.array(self._run(crop(frame, self.region), conf_threshold), dtype=np.float32).reshape(-1, 6)
+        data[:, [0, 2]] += x1
+        data[:, [1, 3]] += y1
+        if not self.food[data[:, 5].astype(np.intp)].any():
+            self.since_refresh = self.refresh_every  # The meal may have moved: look again next frame
+        return data
+
+    def predict(self, images, conf_threshold, imgsz=None):
+        return [self._predict_one(image, conf_threshold) for image in images]
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+_size_controllers = {}
+
+
+def _roi_tables(backend):
+    """
+    (RoiFinder, food class mask) for a backend's classes; read-only once built
+    """
+    with _tables_lock:
+        tables = _tables.get(id(backend))
+        if tables is None:
+            tables = _tables[id(backend)] = (RoiFinder(backend.names), build_food_lookup(backend.names) >= 0)
+        return tables
+
+
+def _size_controller(backend, latency_budget_ms):
+    # Shared per backend: it models how fast this machine runs each size,
+    # not anything about the images, and updates under its own lock
+    with _tables_lock:
+        key = (id(backend), latency_budget_ms)
+        controller = _size_controllers.get(key)
+        if controller is None:
+            controller = _size_controllers[key] = ImageSizeController(latency_budget_ms)
+        return controller
+
+
+def enabled():
+    """
+    True when DIET_DETECT_ROI or DIET_LATENCY_BUDGET_MS changes detection
+    """
+    return bool(DETECT_ROI or LATENCY_BUDGET_MS)
+
+
+def cache_tag():
+    """
+    Suffix for detection cache keys, since results depend on these settings
+    """
+    if not enabled():
+        return ""
+    return f"|roi={DETECT_ROI or 'off'}|budget={LATENCY_BUDGET_MS:g}"
+
+
+# Coarse pass for still photos: only has to locate bowls / tables / food
+FIND_SIZE = 320
+
+
+def detect_still(backend, image, conf_threshold, roi=DETECT_ROI, latency_budget_ms=LATENCY_BUDGET_MS):
+    """
+    Raw (N, 6) detections for one independent photo. The region is found
+    for this image alone (a coarse FIND_SIZE pass for "objects", saliency
+    otherwise) and nothing about it carries over to the next call, so this
+    is safe from any thread. When the coarse pass finds no region its
+    detections are returned as they are. Plain backend.predict when both
+    settings are off.
+    """
+    if not roi and not latency_budget_ms:
+        return backend.predict([image], conf_threshold)[0]
+    finder, _ = _roi_tables(backend)
+    sizes = _size_controller(backend, latency_budget_ms) if latency_budget_ms else None
+    max_size = sizes.size if sizes is not None else IMAGE_SIZES[-1]
+
+    # Both passes count against the budget, so they are timed together
+    start = time.perf_counter()
+    region = None
+    if roi == "objects":
+        size = min(FIND_SIZE, max_size, _round_up(max(image.shape[:2])))
+        coarse = backend.predict([image], conf_threshold, imgsz=size)[0]
+        region = finder.find(image, coarse)
+        if region is None:  # Nothing to crop to: the coarse pass is the answer
+            if sizes is not None:
+                sizes.record(size, (time.perf_counter() - start) * 1000)
+            return coarse
+    elif roi == "saliency":
+        region = finder.find(image)
+
+    target = image if region is None else crop(image, region)
+    size = min(max_size, _round_up(max(target.shape[:2])))
+    data = np.array(backend.predict([target], conf_threshold, imgsz=size)[0], dtype=np.float32).reshape(-1, 6)
+    if sizes is not None:
+        sizes.record(size, (time.perf_counter() - start) * 1000)
+    if region is not None:
+        data[:, [0, 2]] += region[0]
+        data[:, [1, 3]] += region[1]
+    return data
@@ -1,6 +1,36 @@
 # run_detector.py
+#
+#   python run_detector.py                          # live webcam window
+#   python run_detector.py --source meal.mp4 --headless --record detections.jsonl
+#   python run_detector.py --source synthetic:2000 --headless   # throughput, no camera needed
 
-from food_detector import detect_food_from_webcam
+import argparse
+
+from food_detector import HeadlessSink, WindowSink, detect_food_stream
+from frame_sources import open_source
 
 if __name__ == "__main__":
-    detect_food_from_webcam(conf_threshold=0.4)
+    parser = argparse.ArgumentParser(description="Live or replayed food detection")
+    parser.add_argument("--source", default="0",
+                        help="Webcam index, video file, image directory or synthetic[:N]")
+    parser.add_argument("--conf", type=float, default=0.4, help="Confidence threshold")
+    parser.add_argument("--detect-every", type=int, default=1,
+                        help="Run YOLO every N frames and track boxes in between")
+    parser.add_argument("--motion-threshold", type=float, default=None,
+                        help="Also run YOLO when the frame changes by more than this")
+    parser.add_argument("--stats", action="store_true", help="Overlay fps and latency")
+    parser.add_argument("--headless", action="store_true", help="No window; record detections instead")
+    parser.add_argument("--record", help="With --headless, write per-frame detections (JSON lines) here")
+    parser.add_argument("--loop", action="store_true", help="Restart a video / image directory at the end")
+    parser.add_argument("--max-frames", type=int, default=None, help="Stop after this many frames")
+    parser.add_argument("--roi", choices=["objects", "saliency"], default=None,
+                        help="Run YOLO on the bowl / table region (or the most salient one) only")
+    parser.add_argument("--latency-budget", type=float, default=None,
+                        help="Shrink YOLO's input size to keep inference under this many ms")
+    args = parser.parse_args()
+
+    source = open_source(args.source, loop=args.loop)
+    sink = HeadlessSink(args.record) if args.headless else WindowSink(show_stats=args.stats)
+    detect_food_stream(source, sink, conf_threshold=args.conf, detect_every=args.detect_every,
+                       motion_threshold=args.motion_threshold, max_frames=args.max_frames,
+                       roi=args.roi, latency_budget_ms=args.latency_budget)
@@ -133,73 +133,294 @@
 # tracker.py
 
 import cv2
-import json
 import datetime
+import os
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from user_profile import UserProfile
-from calorie_database import calorie_data
-from ultralytics import YOLO
+from nutrition_db import FoodNames
+from log_store import get_log_store
+from log_index import get_log_index
+from daily_totals import get_daily_totals
+from frame_sources import open_camera
+from model_registry import backend_id, get_backend, get_model
+from detection_cache import DetectionCache, get_detection_cache
+from instrumentation import span
+from postprocess import as_boxes, build_food_lookup, filter_food, food_labels, to_numpy
+from portion import PortionEstimator, meal_calories
+from roi import cache_tag, detect_still, enabled as roi_enabled
+
+# === Allowed food items (looked up in the nutrition DB on demand)
+FOOD_CLASSES = FoodNames()
+
+# === YOLO's default confidence threshold
+CONF_THRESHOLD = 0.25
+
+_class_tables_by_backend = {}
+_cache_tables = (None, None, [])  # (food lookup, portion estimator, labels) for cache hits
+_cache_tables_lock = threading.Lock()
+
+# Single background writer for optional image persistence
+_image_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-writer")
+
+
+def __getattr__(name):
+    # Keep `tracker.model` working without loading YOLO at import time
+    if name == "model":
+        return get_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def capture_food_frame(source=None):
+    """
+    Show the webcam until SPACE is pressed and return that frame as a BGR
+    array (None if cancelled). Nothing is written to disk.
+
+    `source` (default: the DIET_CAMERA_SOURCE camera, see frame_sources)
+    can also be a replay source, whose next frame is returned at once
+    without opening a window. Live cameras are released afterwards.
+    """
+    cam = source or open_camera()
+    if not cam.live:
+        with span("capture"):
+            ret, frame = cam.read()
+        return frame if ret else None
 
-# === Load YOLOv8 model
-model = YOLO("yolov8n.pt")
-
-# === Allowed food items
-FOOD_CLASSES = set(calorie_data.keys())
-
-
-def capture_food_photo(filename="captured_food.jpg"):
-    cam = cv2.VideoCapture(0)
     print("📸 Press SPACE to capture image, ESC to exit")
 
-    while True:
-        ret, frame = cam.read()
-        if not ret:
-            break
-
-        cv2.imshow("Capture Food Image", frame)
-        key = cv2.waitKey(1)
-        if key % 256 == 27:  # ESC
-            print("❌ Capture cancelled.")
-            cam.release()
-            cv2.destroyAllWindows()
-            return None
-        elif key % 256 == 32:  # SPACE
-            cv2.imwrite(filename, frame)
-            print(f"✅ Image saved as {filename}")
-            cam.release()
-            cv2.destroyAllWindows()
-            return filename
-
-
-def detect_food(image_path):
-    image = cv2.imread(image_path)
-    results = model(image)[0]
-    detected = []
+    try:
+        while True:
+            with span("capture"):
+                ret, frame = cam.read()
+            if not ret:
+                return None
+
+            cv2.imshow("Capture Food Image", frame)
+            key = cv2.waitKey(1)
+            if key % 256 == 27:  # ESC
+                print("❌ Capture cancelled.")
+                return None
+            elif key % 256 == 32:  # SPACE
+                return frame
+    finally:
+        cam.release()
+        cv2.destroyAllWindows()
+
+
+def save_image_async(frame, filename):
+    """
+    Write a frame to disk on a background thread; returns a Future for the filename
+    """
+    def write():
+        if not cv2.imwrite(filename, frame):
+            raise OSError(f"Could not write {filename}")
+        return filename
+    return _image_writer.submit(write)
 
-    for result in results.boxes.data.tolist():
-        x1, y1, x2, y2, score, class_id = result
-        label = model.names[int(class_id)].lower()
-        if label in FOOD_CLASSES:
-            detected.append(label)
 
-    return detected
+def capture_food_photo(filename="captured_food.jpg"):
+    frame = capture_food_frame()
+    if frame is None:
+        return None
+    cv2.imwrite(filename, frame)
+    print(f"✅ Image saved as {filename}")
+    return filename
+
+
+def _class_tables(backend):
+    """
+    Arrays indexed by class id: lowercase label, and food id (-1 if not a tracked food),
+    plus the portion estimator for the backend's classes. Built once per backend.
+    """
+    tables = _class_tables_by_backend.get(id(backend))
+    if tables is None:
+        names = backend.names
+        labels = np.array([names[i].lower() for i in range(len(names))], dtype=object)
+        tables = _class_tables_by_backend[id(backend)] = (
+            labels, build_food_lookup(names), PortionEstimator(names))
+    return tables
+
+
+def _foods_and_portions(data, lookup, estimator):
+    """
+    Food labels and their portion multipliers from one image's (N, 6) raw detections
+    """
+    with span("postprocess"):
+        food = filter_food(data, lookup)
+        portions = estimator.portions(as_boxes(food), estimator.pixels_per_cm(data))
+        return food_labels(food), portions.astype(np.float64).round(2).tolist()
+
+
+def _postprocess(data, labels, lookup, estimator):
+    """
+    Return (food labels, portions, plain dict of all detections for the
+    detection cache) for one image's raw detections
+    """
+    data = to_numpy(data)
+    detections = {
+        "labels": labels[data[:, 5].astype(np.intp)].tolist(),
+        "boxes": data[:, :4].round(1).tolist(),
+        "scores": data[:, 4].round(4).tolist(),
+    }
+    return (*_foods_and_portions(data, lookup, estimator), detections)
+
+
+def _label_tables(labels):
+    """
+    (food lookup, portion estimator) over every label met in cached
+    detections, so cache hits are decoded without loading the detector.
+    Rebuilt only when a new label turns up.
+    """
+    global _cache_tables
+    with _cache_tables_lock:
+        lookup, estimator, vocabulary = _cache_tables
+        if estimator is None or not estimator.class_ids.keys() >= set(labels):
+            vocabulary = list(dict.fromkeys([*vocabulary, *labels]))
+            lookup, estimator = build_food_lookup(vocabulary), PortionEstimator(vocabulary)
+            _cache_tables = (lookup, estimator, vocabulary)
+        return lookup, estimator
+
+
+def _from_cache(cached):
+    lookup, estimator = _label_tables(cached["labels"])
+    data = estimator.from_labels(cached["labels"], cached["boxes"], cached["scores"])
+    return _foods_and_portions(data, lookup, estimator)
+
+
+def _load_image(source, cache, conf_threshold):
+    """
+    Return (cache key, decoded image, cached detections) for one image: a
+    file path, encoded bytes, or an already decoded BGR array (used as is,
+    without copying). Encoded images are only decoded on a cache miss.
+    """
+    if isinstance(source, np.ndarray):
+        image = source
+        data = memoryview(np.ascontiguousarray(image)).cast("B")
+        shape = image.shape
+    else:
+        image = None
+        shape = None
+        if isinstance(source, (str, os.PathLike)):
+            try:
+                with open(source, "rb") as f:
+                    data = f.read()
+            except OSError:
+                return None, None, None
+        else:
+            data = memoryview(source)
+
+    key = None
+    if cache is not None:
+        with span("cache.lookup"):
+            key = DetectionCache.make_key(data, backend_id() + cache_tag(), conf_threshold, shape)
+            cached = cache.get(key)
+        if cached is not None:
+            return key, None, cached
+    if image is None:
+        with span("decode"):
+            image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    return key, image, None
+
+
+def detect_food(image, conf_threshold=CONF_THRESHOLD):
+    """
+    Detected food labels for an image path, encoded image bytes or BGR array
+    """
+    return detect_food_portions(image, conf_threshold)[0]
+
+
+def detect_food_portions(image, conf_threshold=CONF_THRESHOLD):
+    """
+    Detect food in one image (path, encoded bytes or BGR array) and estimate
+    each item's portion from its box size relative to a bowl / cup / fork /
+    table in the photo. Returns (foods, portion multipliers); see
+    portion.meal_calories. Raises ValueError if the image cannot be read.
+    """
+    cache = get_detection_cache()
+    key, image, detections = _load_image(image, cache, conf_threshold)
+
+    if detections is not None:
+        return _from_cache(detections)
+    if image is None:
+        raise ValueError("Could not read image")
+
+    backend = get_backend()
+    labels, lookup, estimator = _class_tables(backend)
+    with span("inference"):
+        data = detect_still(backend, image, conf_threshold)  # ROI / input size, if enabled
+    foods, portions, detections = _postprocess(data, labels, lookup, estimator)
+    if cache is not None:
+        cache.put(key, detections)
+    return foods, portions
+
+
+def detect_food_batch(image_paths, batch_size=16, num_workers=4, conf_threshold=CONF_THRESHOLD):
+    """
+    Detect food in many images. Yields (path, detected foods, portions) in
+    input order; foods and portions are None for images that could not be read.
+
+    Images are read, hashed against the detection cache and decoded on a
+    thread pool, with the next batch loading while the current one runs
+    through YOLO. Only cache misses are sent to the model, which is not
+    even loaded when every image is a cache hit.
+    """
+    backend = None
+    cache = get_detection_cache()
+    paths = list(image_paths)
+    batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+
+    def load(path):
+        return _load_image(path, cache, conf_threshold)
+
+    with ThreadPoolExecutor(max_workers=num_workers) as pool:
+        pending = pool.map(load, batches[0]) if batches else None
+        for n, batch in enumerate(batches):
+            loaded = list(pending)
+            if n + 1 < len(batches):
+                pending = pool.map(load, batches[n + 1])
+
+            detected = [(None, None)] * len(batch)
+            misses = []
+            for i, (key, image, cached) in enumerate(loaded):
+                if cached is not None:
+                    detected[i] = _from_cache(cached)
+                elif image is not None:
+                    misses.append(i)
+
+            results = []
+            if misses:
+                if backend is None:
+                    backend = get_backend()
+                    labels, lookup, estimator = _class_tables(backend)
+                with span("inference.batch"):
+                    if roi_enabled():
+                        results = [detect_still(backend, loaded[i][1], conf_threshold) for i in misses]
+                    else:
+                        results = backend.predict([loaded[i][1] for i in misses], conf_threshold)
+            for i, data in zip(misses, results):
+                foods, portions, detections = _postprocess(data, labels, lookup, estimator)
+                detected[i] = (foods, portions)
+                if cache is not None:
+                    cache.put(loaded[i][0], detections)
+
+            for path, (foods, portions) in zip(batch, detected):
+                yield path, foods, portions
 
 
 def load_existing_user(name):
-    try:
-        with open("tracker_log.json", "r") as f:
-            logs = json.load(f)
-        for entry in reversed(logs):  # Check latest first
-            if entry["user"] == name and "profile" in entry:
-                return entry["profile"]
-    except FileNotFoundError:
-        return None
-    return None
+    index = get_log_index()
+    if index.loaded:
+        return index.latest_profile(name)
+    # Index not built yet: a tail scan of the store finds recent users without loading the log
+    return get_log_store().latest_profile(name)
 
 
-def log_food_entry(name, food_list, total_calories, calorie_goal, profile):
-    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+def log_food_entry(name, food_list, total_calories, calorie_goal, profile, timestamp=None, verbose=True):
+    if timestamp is None:
+        timestamp = datetime.datetime.now()
     entry = {
-        "timestamp": now,
+        "timestamp": timestamp.strftime("%Y-%m-%d %H:%M:%S"),
         "user": name,
         "profile": profile,
         "foods": food_list,
@@ -207,18 +428,13 @@ def log_food_entry(name, food_list, total_calories, calorie_goal, profile):
         "daily_goal": calorie_goal
     }
 
-    try:
-        with open("tracker_log.json", "r") as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        data = []
-
-    data.append(entry)
-
-    with open("tracker_log.json", "w") as f:
-        json.dump(data, f, indent=4)
+    with span("log.append"):
+        get_log_store().append(entry)
+    with span("log.totals_sync"):
+        get_daily_totals().sync()
 
-    print("📦 Entry logged successfully!\n")
+    if verbose:
+        print("📦 Entry logged successfully!\n")
 
 
 def run_tracker():
@@ -256,18 +472,20 @@ def run_tracker():
     print(f"\n🔍 Daily Calorie Target: {daily_goal} kcal")
 
     # === Capture and detect
-    img_path = capture_food_photo()
-    if not img_path:
+    frame = capture_food_frame()
+    if frame is None:
         return
+    save_image_async(frame, "captured_food.jpg")  # Kept for reference, off the detection path
 
-    food_items = detect_food(img_path)
+    food_items, portions = detect_food_portions(frame)
     if not food_items:
         print("⚠️ No food items detected.")
         return
 
-    # === Calculate calories
-    total_calories = sum(calorie_data[item] for item in food_items)
-    print(f"\n🍽️ You are about to eat: {', '.join(food_items)}")
+    # === Calculate calories, scaled by estimated portion size
+    total_calories = meal_calories(food_items, portions)
+    eating = [item if p == 1 else f"{item} (x{p:g})" for item, p in zip(food_items, portions)]
+    print(f"\n🍽️ You are about to eat: {', '.join(eating)}")
     print(f"🔥 Total Calories: {total_calories} kcal")
 
     # === Impact analysis
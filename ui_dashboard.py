@@ -0,0 +1,159 @@
+# ui_dashboard.py
+
+import datetime
+import math
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from compact_log import plain_number
+from log_index import get_log_index
+
+
+class TodayLogModel(QAbstractTableModel):
+    """
+    Today's entries for one user, read straight from the log index.
+
+    The model only holds the user's row numbers into the index's CompactLog;
+    cells are formatted when the view asks for them, i.e. only for visible
+    rows. refresh() announces newly appended entries as inserted rows, so
+    the view never rebuilds what it already shows.
+    """
+
+    HEADERS = ["Time", "Foods", "Calories"]
+
+    def __init__(self, log_index=None, parent=None):
+        super().__init__(parent)
+        self.log_index = log_index or get_log_index()
+        self.user = None
+        self.day = None
+        self.rows = ()
+        self.count = 0
+
+    def set_user(self, user, day=None):
+        self.beginResetModel()
+        self.user = user
+        self.day = day or datetime.date.today().isoformat()
+        self.rows = self.log_index.day_rows(user, self.day)
+        self.count = len(self.rows)
+        self.endResetModel()
+
+    def refresh(self):
+        """
+        Pull new entries from the index; returns how many rows were appended
+        """
+        if self.user is None:
+            return 0
+        today = datetime.date.today().isoformat()
+        if today != self.day:  # Past midnight: start a new day
+            self.set_user(self.user, today)
+            return self.count
+        rows = self.log_index.day_rows(self.user, self.day)
+        added = len(rows) - self.count
+        if added > 0:
+            self.beginInsertRows(QModelIndex(), self.count, len(rows) - 1)
+            self.rows, self.count = rows, len(rows)
+            self.endInsertRows()
+        return max(added, 0)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        log = self.log_index.rows
+        row = self.rows[index.row()]
+        column = index.column()
+        if column == 0:
+            return log.timestamp_str(row)[11:]
+        if column == 1:
+            return ", ".join(log.foods_of(row))
+        return str(plain_number(log.calories[row]))
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+
+class CaloriePie:
+    """
+    Eaten vs. remaining donut on a matplotlib canvas, updated in place.
+
+    The wedges and their labels are created once and marked animated; a
+    full draw caches the static background (axes, title), and update()
+    only moves the wedge angles and label positions and blits them over
+    that background.
+    """
+
+    COLORS = ["#ff9999", "#99ff99"]
+
+    def __init__(self, figure, canvas):
+        self.figure = figure
+        self.canvas = canvas
+        self.ax = None
+        self.background = None
+        self.wedges = self.labels = self.percents = ()
+        canvas.mpl_connect("draw_event", self._on_draw)
+
+    def build(self):
+        """
+        (Re)create the pie artists, e.g. after the figure showed something else
+        """
+        self.figure.clear()
+        self.ax = self.figure.add_subplot(111)
+        self.wedges, self.labels, self.percents = self.ax.pie(
+            [0, 1], labels=["Eaten", "Remaining"], autopct="%1.1f%%", colors=self.COLORS)
+        self.ax.set_title("Calorie Progress")
+        for artist in self._artists():
+            artist.set_animated(True)
+        self.background = None
+        self.canvas.draw()
+
+    def detach(self):
+        """
+        Stop drawing the pie (another chart is taking over the figure)
+        """
+        self.ax = None
+        self.background = None
+
+    def _artists(self):
+        return [*self.wedges, *self.labels, *self.percents]
+
+    def _on_draw(self, event):
+        # Full redraws (first show, resize) refresh the cached background
+        if self.ax is None:
+            return
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self._artists():
+            self.figure.draw_artist(artist)
+
+    def update(self, eaten, goal):
+        if self.ax is None:
+            self.build()
+        remaining = max(0, goal - eaten)
+        total = eaten + remaining
+        fraction = eaten / total if total > 0 else 0.0
+        bounds = [(0.0, 360.0 * fraction), (360.0 * fraction, 360.0)]
+        for i, (theta1, theta2) in enumerate(bounds):
+            self.wedges[i].set_theta1(theta1)
+            self.wedges[i].set_theta2(theta2)
+            mid = math.radians((theta1 + theta2) / 2)
+            x, y = math.cos(mid), math.sin(mid)
+            self.labels[i].set_position((1.1 * x, 1.1 * y))
+            self.labels[i].set_horizontalalignment("left" if x > 0 else "right")
+            self.percents[i].set_position((0.6 * x, 0.6 * y))
+            self.percents[i].set_text(f"{100 * (theta2 - theta1) / 360:.1f}%")
+
+        if self.background is None:
+            self.canvas.draw()  # Caches the background, then draws the artists
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_artists()
+        self.canvas.blit(self.figure.bbox)
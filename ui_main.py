@@ -1,19 +1,29 @@
 # ui_main.py
 
 import sys
-import json
 import datetime
+import cv2
 from PyQt5.QtWidgets import (
-    QApplication, QWidget, QLabel, QLineEdit, QPushButton,
-    QVBoxLayout, QHBoxLayout, QMessageBox, QTableWidget, QTableWidgetItem
+    QApplication, QWidget, QLabel, QLineEdit, QPushButton, QShortcut,
+    QVBoxLayout, QHBoxLayout, QMessageBox, QTableView, QHeaderView, QProgressBar
 )
-from PyQt5.QtGui import QFont
+from PyQt5.QtCore import Qt, QThreadPool, QTimer
+from PyQt5.QtGui import QFont, QImage, QKeySequence, QPixmap
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
-from user_profile import UserProfile
-from calorie_database import calorie_data
-from tracker import capture_food_photo, detect_food, log_food_entry, load_existing_user
+from user_profile import calorie_goal
+from analytics import get_analytics
+from daily_totals import get_daily_totals
+from instrumentation import span
+from log_index import get_log_index
+from model_registry import warm_up_async
+from tracker import load_existing_user
+from ui_dashboard import CaloriePie, TodayLogModel
+from ui_worker import DetectionJob
+
+# Redraws requested within this window are coalesced into one
+REFRESH_INTERVAL_MS = 150
 
 class SmartDietTracker(QWidget):
     def __init__(self):
@@ -27,6 +37,19 @@ class SmartDietTracker(QWidget):
         self.goal = 0
         self.total_today = 0
 
+        # Single worker thread: captures run one at a time, off the GUI thread
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(1)
+        self.job = None
+        self.pending_capture = False
+        self.show_trend = False
+
+        # Throttled dashboard refresh: bursts of updates cost a single redraw
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(REFRESH_INTERVAL_MS)
+        self.refresh_timer.timeout.connect(self.refresh_dashboard)
+
     def init_ui(self):
         layout = QVBoxLayout()
 
@@ -48,7 +71,38 @@ class SmartDietTracker(QWidget):
         self.capture_button = QPushButton("📸 Capture Food & Detect")
         self.capture_button.setEnabled(False)
         self.capture_button.clicked.connect(self.capture_and_detect)
-        layout.addWidget(self.capture_button)
+
+        self.shutter_button = QPushButton("📷 Take Photo")
+        self.shutter_button.setEnabled(False)
+        self.shutter_button.clicked.connect(self.take_photo)
+        QShortcut(QKeySequence(Qt.Key_Space), self, activated=self.take_photo)
+
+        self.cancel_button = QPushButton("✖ Cancel")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_detection)
+        QShortcut(QKeySequence(Qt.Key_Escape), self, activated=self.cancel_detection)
+
+        capture_row = QHBoxLayout()
+        capture_row.addWidget(self.capture_button)
+        capture_row.addWidget(self.shutter_button)
+        capture_row.addWidget(self.cancel_button)
+
+        self.trend_button = QPushButton("📈 Trends")
+        self.trend_button.setEnabled(False)
+        self.trend_button.clicked.connect(self.toggle_trend)
+        capture_row.addWidget(self.trend_button)
+        layout.addLayout(capture_row)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.hide()
+        layout.addWidget(self.progress_bar)
+
+        # Live camera preview while a capture waits for the shutter
+        self.preview_label = QLabel()
+        self.preview_label.setAlignment(Qt.AlignCenter)
+        self.preview_label.hide()
+        layout.addWidget(self.preview_label)
 
         # Food Output
         self.output_label = QLabel("")
@@ -58,10 +112,15 @@ class SmartDietTracker(QWidget):
         # Plot area
         self.figure = Figure(figsize=(3, 3))
         self.canvas = FigureCanvas(self.figure)
+        self.pie = CaloriePie(self.figure, self.canvas)
         layout.addWidget(self.canvas)
 
-        # Table of today's log
-        self.table = QTableWidget()
+        # Table of today's log, read lazily from the log index
+        self.today_model = TodayLogModel(get_log_index())
+        self.table = QTableView()
+        self.table.setModel(self.today_model)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
         layout.addWidget(QLabel("📅 Today's Food Log"))
         layout.addWidget(self.table)
 
@@ -78,85 +137,144 @@ class SmartDietTracker(QWidget):
 
         if profile:
             self.profile = profile
-            self.goal = round(UserProfile(
-                name, profile["age"], profile["gender"], profile["height"],
-                profile["weight"], "moderate", profile["goal"]
-            ).get_calorie_goal())
+            self.goal = calorie_goal(profile)
             QMessageBox.information(self, "Profile Loaded", f"Welcome back, {name}!\nCalorie Goal: {self.goal} kcal")
             self.capture_button.setEnabled(True)
-            self.update_today_table()
+            self.trend_button.setEnabled(True)
+            self.today_model.set_user(name)
             self.update_plot()
         else:
             QMessageBox.warning(self, "Profile Missing", "No profile found. Please run tracker.py first to set up.")
 
     def capture_and_detect(self):
-        path = capture_food_photo("assets/captured_food.jpg")
-        if not path:
+        if self.job is not None:
+            # Coalesce clicks while busy into a single follow-up capture
+            self.pending_capture = True
+            self.output_label.setText("⏳ Capture queued...")
             return
 
-        food_items = detect_food(path)
+        self.job = DetectionJob(self.username, self.goal, self.profile)
+        self.job.signals.progress.connect(self.on_detection_progress)
+        self.job.signals.preview.connect(self.on_preview)
+        self.job.signals.finished.connect(self.on_detection_finished)
+        self.job.signals.cancelled.connect(self.on_detection_cancelled)
+        self.job.signals.failed.connect(self.on_detection_failed)
+
+        self.cancel_button.setEnabled(True)
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.pool.start(self.job)
+
+    def take_photo(self):
+        if self.job is not None and self.shutter_button.isEnabled():
+            self.job.take_photo()
+            self.shutter_button.setEnabled(False)
+
+    def on_preview(self, frame):
+        if self.job is None:
+            return  # Late frame from a finished job
+        if self.preview_label.isHidden():
+            self.preview_label.show()
+            self.shutter_button.setEnabled(True)
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        h, w = rgb.shape[:2]
+        image = QImage(rgb.data, w, h, 3 * w, QImage.Format_RGB888)
+        self.preview_label.setPixmap(QPixmap.fromImage(image).scaledToWidth(min(w, 480), Qt.SmoothTransformation))
+        self.job.preview_shown()
+
+    def cancel_detection(self):
+        self.pending_capture = False
+        if self.job is not None:
+            self.job.cancel()
+
+    def on_detection_progress(self, percent, message):
+        self.progress_bar.setValue(percent)
+        self.output_label.setText(message)
+
+    def on_detection_finished(self, food_items, total_cal):
         if not food_items:
             self.output_label.setText("⚠️ No food detected.")
-            return
-
-        total_cal = sum(calorie_data[item] for item in food_items)
-        self.total_today += total_cal
-
-        food_text = ", ".join(food_items)
-        self.output_label.setText(f"🍕 Detected: {food_text} | 🔥 {total_cal} kcal")
+        else:
+            food_text = ", ".join(food_items)
+            self.output_label.setText(f"🍕 Detected: {food_text} | 🔥 {total_cal} kcal")
+
+            # Update UI
+            self.schedule_refresh()
+        self.job_done()
+
+    def on_detection_cancelled(self):
+        self.output_label.setText("❌ Capture cancelled.")
+        self.job_done()
+
+    def on_detection_failed(self, message):
+        self.output_label.setText(f"⚠️ Detection failed: {message}")
+        self.job_done()
+
+    def job_done(self):
+        self.job = None
+        self.cancel_button.setEnabled(False)
+        self.shutter_button.setEnabled(False)
+        self.preview_label.hide()
+        self.preview_label.clear()
+        self.progress_bar.hide()
+        if self.pending_capture:
+            self.pending_capture = False
+            self.capture_and_detect()
+
+    def toggle_trend(self):
+        self.show_trend = not self.show_trend
+        self.trend_button.setText("🥧 Today" if self.show_trend else "📈 Trends")
+        if self.show_trend:
+            self.pie.detach()
+        else:
+            self.pie.build()
+        self.update_plot()
 
-        # Log it
-        log_food_entry(self.username, food_items, total_cal, self.goal, self.profile)
+    def schedule_refresh(self):
+        """
+        Ask for a table and chart refresh; the first request starts the
+        timer and any further ones before it fires are absorbed
+        """
+        if not self.refresh_timer.isActive():
+            self.refresh_timer.start()
 
-        # Update UI
+    def refresh_dashboard(self):
         self.update_today_table()
         self.update_plot()
 
     def update_plot(self):
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
+        with span("ui.plot"):
+            self._update_plot()
+
+    def _update_plot(self):
+        if self.show_trend:
+            self.figure.clear()
+            get_analytics().plot_trend(self.figure.add_subplot(111), self.username)
+            self.figure.tight_layout()
+            self.canvas.draw()
+            return
 
         eaten = self.get_today_total()
-        remaining = max(0, self.goal - eaten)
-
-        ax.pie([eaten, remaining], labels=["Eaten", "Remaining"],
-               autopct="%1.1f%%", colors=["#ff9999", "#99ff99"])
-        ax.set_title("Calorie Progress")
-        self.canvas.draw()
+        self.total_today = eaten  # Keep the counter in step with the aggregate store
+        self.pie.update(eaten, self.goal)  # Moves the existing wedges and blits them
 
     def update_today_table(self):
-        try:
-            with open("tracker_log.json", "r") as f:
-                logs = json.load(f)
-        except:
-            logs = []
-
-        today = datetime.date.today().isoformat()
-        filtered = [entry for entry in logs if entry["user"] == self.username and entry["timestamp"].startswith(today)]
-
-        self.table.setRowCount(len(filtered))
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(["Time", "Foods", "Calories"])
+        with span("ui.table"):
+            self._update_today_table()
 
-        for i, entry in enumerate(filtered):
-            self.table.setItem(i, 0, QTableWidgetItem(entry["timestamp"].split()[1]))
-            self.table.setItem(i, 1, QTableWidgetItem(", ".join(entry["foods"])))
-            self.table.setItem(i, 2, QTableWidgetItem(str(entry["total_calories"])))
+    def _update_today_table(self):
+        if self.today_model.user != self.username:
+            self.today_model.set_user(self.username)
+        else:
+            self.today_model.refresh()  # Inserts only the rows logged since last time
 
     def get_today_total(self):
-        try:
-            with open("tracker_log.json", "r") as f:
-                logs = json.load(f)
-        except:
-            logs = []
-
         today = datetime.date.today().isoformat()
-        total = sum(entry["total_calories"]
-                    for entry in logs if entry["user"] == self.username and entry["timestamp"].startswith(today))
-        return total
+        return get_daily_totals().get(self.username, today)["calories"]
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = SmartDietTracker()
     window.show()
+    warm_up_async()  # Load YOLO while the window is already interactive
     sys.exit(app.exec_())
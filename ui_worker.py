@@ -0,0 +1,112 @@
+# ui_worker.py
+
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+from frame_sources import open_camera
+from instrumentation import profiled, span
+from log_index import get_log_index
+from portion import meal_calories
+from tracker import detect_food_portions, log_food_entry, save_image_async
+
+
+class DetectionSignals(QObject):
+    progress = pyqtSignal(int, str)      # percent, stage message
+    preview = pyqtSignal(object)         # live camera frame (BGR array) while waiting for the shutter
+    finished = pyqtSignal(list, int)     # detected foods, total calories
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+
+class DetectionJob(QRunnable):
+    """
+    Capture -> detect -> log, run on a QThreadPool thread.
+    Signals are queued back to the GUI thread, so slots can touch widgets.
+
+    The job only grabs frames; it never opens a window. Live camera frames
+    go to the GUI as `preview` signals (one in flight at a time: the GUI
+    calls preview_shown() when it is ready for the next), and the GUI calls
+    take_photo() to keep the current frame.
+    """
+
+    def __init__(self, username, goal, profile, image_path="assets/captured_food.jpg"):
+        super().__init__()
+        self.setAutoDelete(False)  # Lifetime is owned by the widget holding the job
+        self.signals = DetectionSignals()
+        self.username = username
+        self.goal = goal
+        self.profile = profile
+        self.image_path = image_path
+        self._cancel = threading.Event()
+        self._shutter = threading.Event()
+        self._preview_pending = threading.Event()
+
+    def cancel(self):
+        """
+        Request cancellation; honoured between pipeline stages
+        """
+        self._cancel.set()
+
+    def take_photo(self):
+        self._shutter.set()
+
+    def preview_shown(self):
+        self._preview_pending.clear()
+
+    def _capture(self):
+        cam = open_camera()
+        if not cam.live:  # Replay source: its next frame is the photo
+            with span("capture"):
+                ok, frame = cam.read()
+            return frame if ok else None
+        try:
+            while not self._cancel.is_set():
+                with span("capture"):
+                    ok, frame = cam.read()
+                if not ok:
+                    return None
+                if self._shutter.is_set():
+                    return frame
+                if not self._preview_pending.is_set():  # Drop frames the GUI has no time for
+                    self._preview_pending.set()
+                    self.signals.preview.emit(frame)
+            return None
+        finally:
+            cam.release()
+
+    def run(self):
+        try:
+            with span("job"), profiled("detection_job"):
+                self._run()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+
+    def _run(self):
+        self.signals.progress.emit(10, "📸 Press SPACE or Take Photo to capture...")
+        frame = self._capture()
+        if frame is None or self._cancel.is_set():
+            self.signals.cancelled.emit()
+            return
+        if self.image_path:
+            save_image_async(frame, self.image_path)  # Written in the background, not read back
+
+        self.signals.progress.emit(40, "🧠 Detecting food...")
+        food_items, portions = detect_food_portions(frame)
+        if self._cancel.is_set():
+            self.signals.cancelled.emit()
+            return
+        if not food_items:
+            self.signals.finished.emit([], 0)
+            return
+
+        total_cal = meal_calories(food_items, portions)
+
+        # Past this point the entry is written, so the job always completes
+        self.signals.progress.emit(80, "📦 Logging entry...")
+        log_food_entry(self.username, food_items, total_cal, self.goal, self.profile)
+        with span("log.index_refresh"):
+            get_log_index().refresh()  # Pull the new entry in here, not on the GUI thread
+
+        self.signals.progress.emit(100, "✅ Done")
+        self.signals.finished.emit(food_items, total_cal)
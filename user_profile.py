@@ -1,7 +1,47 @@
 # user_profile.py
 
+from functools import lru_cache
+
+import numpy as np
+
+# === Categorical codes shared by UserProfile and ProfileBatch
+GENDERS = ['male', 'female']
+BMR_OFFSETS = np.array([5.0, -161.0])          # Mifflin-St Jeor constant, by gender code
+
+ACTIVITY_LEVELS = ['sedentary', 'light', 'moderate', 'active', 'very active']
+ACTIVITY_MULTIPLIERS = np.array([
+    1.2,     # Little or no exercise
+    1.375,   # Light exercise/sports 1–3 days/week
+    1.55,    # Moderate exercise 3–5 days/week
+    1.725,   # Hard exercise 6–7 days/week
+    1.9,     # Very hard exercise or physical job
+])
+
+GOALS = ['maintain', 'lose', 'gain']
+GOAL_ADJUSTMENTS = np.array([0.0, -500.0, 500.0])
+
+# Inputs the memoized results depend on
+_INPUTS = {'age', 'gender', 'height_cm', 'weight_kg', 'activity_level', 'goal'}
+
+
+def encode(values, categories, default=None):
+    """
+    Map an array of category strings to int codes (index into categories).
+    Unknown values get `default`, or raise ValueError if default is None.
+    """
+    values = np.asarray(values, dtype=object)
+    uniques, inverse = np.unique(np.char.lower(values.astype(str)), return_inverse=True)
+    lookup = {name: code for code, name in enumerate(categories)}
+    codes = np.array([lookup.get(name, -1 if default is None else default) for name in uniques], dtype=np.int8)
+    if (codes < 0).any():
+        bad = [str(name) for name, code in zip(uniques, codes) if code < 0]
+        raise ValueError(f"Invalid value(s) {bad}. Expected one of {categories}.")
+    return codes[inverse.reshape(-1)]
+
+
 class UserProfile:
     def __init__(self, name, age, gender, height_cm, weight_kg, activity_level, goal):
+        self._results = {}
         self.name = name
         self.age = age
         self.gender = gender.lower()
@@ -10,48 +50,50 @@ class UserProfile:
         self.activity_level = activity_level.lower()
         self.goal = goal.lower()
 
+    def __setattr__(self, name, value):
+        # Changing weight, goal or any other input invalidates the memoized results
+        if name in _INPUTS:
+            self._results.clear()
+        super().__setattr__(name, value)
+
+    def _memo(self, key, compute):
+        if key not in self._results:
+            self._results[key] = compute()
+        return self._results[key]
+
     def calculate_bmr(self):
         """
         Calculate BMR using Mifflin-St Jeor Equation
         """
-        if self.gender == 'male':
-            return 10 * self.weight_kg + 6.25 * self.height_cm - 5 * self.age + 5
-        elif self.gender == 'female':
-            return 10 * self.weight_kg + 6.25 * self.height_cm - 5 * self.age - 161
-        else:
-            raise ValueError("Invalid gender. Please use 'male' or 'female'.")
+        def compute():
+            if self.gender not in GENDERS:
+                raise ValueError("Invalid gender. Please use 'male' or 'female'.")
+            offset = float(BMR_OFFSETS[GENDERS.index(self.gender)])
+            return 10 * self.weight_kg + 6.25 * self.height_cm - 5 * self.age + offset
+        return self._memo('bmr', compute)
 
     def get_activity_multiplier(self):
         """
         Return multiplier based on activity level
         """
-        levels = {
-            'sedentary': 1.2,            # Little or no exercise
-            'light': 1.375,              # Light exercise/sports 1–3 days/week
-            'moderate': 1.55,            # Moderate exercise 3–5 days/week
-            'active': 1.725,             # Hard exercise 6–7 days/week
-            'very active': 1.9           # Very hard exercise or physical job
-        }
-        return levels.get(self.activity_level, 1.2)
+        if self.activity_level in ACTIVITY_LEVELS:
+            return float(ACTIVITY_MULTIPLIERS[ACTIVITY_LEVELS.index(self.activity_level)])
+        return float(ACTIVITY_MULTIPLIERS[0])
 
     def calculate_tdee(self):
         """
         Calculate Total Daily Energy Expenditure (TDEE)
         """
-        bmr = self.calculate_bmr()
-        return bmr * self.get_activity_multiplier()
+        return self._memo('tdee', lambda: self.calculate_bmr() * self.get_activity_multiplier())
 
     def get_calorie_goal(self):
         """
         Adjust calorie target based on user's goal
         """
-        tdee = self.calculate_tdee()
-        if self.goal == 'lose':
-            return tdee - 500
-        elif self.goal == 'gain':
-            return tdee + 500
-        else:
-            return tdee
+        def compute():
+            code = GOALS.index(self.goal) if self.goal in GOALS else 0
+            return self.calculate_tdee() + float(GOAL_ADJUSTMENTS[code])
+        return self._memo('goal', compute)
 
     def summary(self):
         """
@@ -63,3 +105,63 @@ class UserProfile:
             'TDEE': round(self.calculate_tdee(), 2),
             'Daily Calorie Goal': round(self.get_calorie_goal(), 2)
         }
+
+
+class ProfileBatch:
+    """
+    BMR / TDEE / calorie goal for many profiles at once.
+
+    Takes one NumPy column per field, with gender, activity level and goal
+    pre-encoded as int codes (see encode() and the GENDERS, ACTIVITY_LEVELS
+    and GOALS tables), so the whole computation is a few array operations.
+    Results match UserProfile for the same inputs.
+    """
+
+    def __init__(self, age, gender, height_cm, weight_kg, activity, goal):
+        self.age = np.asarray(age, dtype=np.float64)
+        self.gender = np.asarray(gender, dtype=np.int8)
+        self.height_cm = np.asarray(height_cm, dtype=np.float64)
+        self.weight_kg = np.asarray(weight_kg, dtype=np.float64)
+        self.activity = np.asarray(activity, dtype=np.int8)
+        self.goal = np.asarray(goal, dtype=np.int8)
+
+    @classmethod
+    def from_records(cls, profiles, activity_level='moderate'):
+        """
+        Build from saved profile dicts (age, gender, height, weight, goal),
+        as stored in the food log
+        """
+        profiles = list(profiles)
+        return cls(
+            [p['age'] for p in profiles],
+            encode([p['gender'] for p in profiles], GENDERS),
+            [p['height'] for p in profiles],
+            [p['weight'] for p in profiles],
+            encode([p.get('activity_level', activity_level) for p in profiles], ACTIVITY_LEVELS, default=0),
+            encode([p['goal'] for p in profiles], GOALS, default=0),
+        )
+
+    def __len__(self):
+        return len(self.age)
+
+    def bmr(self):
+        return 10 * self.weight_kg + 6.25 * self.height_cm - 5 * self.age + BMR_OFFSETS[self.gender]
+
+    def tdee(self):
+        return self.bmr() * ACTIVITY_MULTIPLIERS[self.activity]
+
+    def calorie_goal(self):
+        return self.tdee() + GOAL_ADJUSTMENTS[self.goal]
+
+
+@lru_cache(maxsize=1024)
+def _saved_goal(age, gender, height, weight, goal, activity_level):
+    return UserProfile('', age, gender, height, weight, activity_level, goal).get_calorie_goal()
+
+
+def calorie_goal(profile, activity_level='moderate'):
+    """
+    Rounded daily calorie goal for a saved profile dict, memoized on its values
+    """
+    return round(_saved_goal(profile['age'], profile['gender'], profile['height'],
+                             profile['weight'], profile['goal'], activity_level))